@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, read automatically when gunicorn is started from the
+project root: ``gunicorn gywan_project.wsgi:application``.
+"""
+import multiprocessing
+
+# Module-level names are read as gunicorn settings, so `config` can't be imported
+import decouple
+
+bind = decouple.config('GUNICORN_BIND', default='127.0.0.1:8000')
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+
+# Import the app once in the master and fork workers from it (see main.warmup)
+preload_app = True
+
+
+def when_ready(server):
+    from main.warmup import warmup
+    server.log.info(warmup())
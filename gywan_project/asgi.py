@@ -0,0 +1,14 @@
+"""
+ASGI config for GYWAN project.
+
+Serve with ``uvicorn gywan_project.asgi:application`` (or gunicorn with
+``-k uvicorn.workers.UvicornWorker``) to run the async views on an event loop.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gywan_project.settings')
+
+application = get_asgi_application()
@@ -4,6 +4,7 @@ Django settings for GYWAN website project.
 
 from pathlib import Path
 import os
+import django
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,12 +26,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'main',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.middleware.CompressionMiddleware',
+    'main.middleware.ReplicaPinningMiddleware',
+    'main.middleware.AnonymousFastPathMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,7 +48,9 @@ ROOT_URLCONF = 'gywan_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.template_profiling.ProfilingDjangoTemplates',
+        # Keep the alias of the stock backend; engines['django'] is looked up by name
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -53,19 +60,62 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'main.context_processors.site_context',
+                'main.context_processors.fast_path',
             ],
         },
     },
 ]
 
+# Time every template, include and block render and show the results on each
+# page (see main.template_profiling and `manage.py profile_templates`)
+TEMPLATE_PROFILING = config('TEMPLATE_PROFILING', default=False, cast=bool)
+if TEMPLATE_PROFILING:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('main.middleware.CompressionMiddleware') + 1,
+        'main.middleware.TemplateProfilingMiddleware',
+    )
+
 WSGI_APPLICATION = 'gywan_project.wsgi.application'
+ASGI_APPLICATION = 'gywan_project.asgi.application'
 
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open across requests instead of reconnecting each time
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if django.VERSION >= (5, 1):
+    # Take the write lock up front so concurrent writers wait on busy_timeout
+    # instead of failing with "database is locked" on lock upgrade
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+# Optional read replica (e.g. a LiteFS/Litestream copy); reads are routed
+# there by main.db.PrimaryReplicaRouter
+DATABASE_REPLICA_NAME = config('DATABASE_REPLICA_NAME', default='')
+if DATABASE_REPLICA_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DATABASE_REPLICA_NAME,
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['main.db.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = 10
+
+# Applied to every new SQLite connection (see main.db.configure_sqlite)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 # Password validation
@@ -97,10 +147,66 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Serve {% cssbundle %} blocks from static bundles (see `manage.py build_css_bundles`)
+CSS_BUNDLES = config('CSS_BUNDLES', default=not DEBUG, cast=bool)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache: a per-process LRU in front of a file cache shared by all workers
+# (see main.cache.TieredCache); content-derived entries are keyed on the
+# per-model versions in main.versions, so no cross-worker invalidation is needed
+CACHES = {
+    'default': {
+        'BACKEND': 'main.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=500, cast=int),
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=5, cast=int),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+# Lifetime of output cached under a content version (main.versions.cached);
+# superseded versions are never read again, so this only bounds how long they
+# occupy the file cache
+VERSIONED_CACHE_TIMEOUT = config('VERSIONED_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Detail pages resolve slugs through the cache (see main.slug_cache)
+SLUG_CACHE_TIMEOUT = 60 * 60
+SLUG_CACHE_MISS_TIMEOUT = 30
+
+# Anonymous GETs skip sessions and CSRF cookies (see main.middleware.AnonymousFastPathMiddleware)
+FAST_PATH_EXCLUDE = ['/admin/', '/donate/']
+FAST_PATH_MAX_AGE = config('FAST_PATH_MAX_AGE', default=60, cast=int)
+
+# Newsletter signups are buffered and written in batches (see main.newsletter)
+NEWSLETTER_BATCH_SIZE = config('NEWSLETTER_BATCH_SIZE', default=50, cast=int)
+NEWSLETTER_FLUSH_SECONDS = config('NEWSLETTER_FLUSH_SECONDS', default=1.0, cast=float)
+
+# Data retention (see main.retention and `manage.py archive_old_rows`)
+ARCHIVE_ROOT = config('ARCHIVE_ROOT', default=str(BASE_DIR / 'archive'))
+# Days to keep rows per policy; unset policies use the defaults in main.retention
+RETENTION_DAYS = {}
+
+# Dynamic response compression (see main.middleware.CompressionMiddleware)
+COMPRESSION_MINIFY_HTML = True
+COMPRESSION_CACHE_TIMEOUT = 60 * 60
+
+# Pre-rendered HTML (see `manage.py prerender_site`)
+PRERENDER_ROOT = config('PRERENDER_ROOT', default=str(BASE_DIR / 'prerendered'))
+PRERENDER_HOST = config('PRERENDER_HOST', default='')
+
+# Related content recommendations (see `manage.py build_related`)
+RELATED_INDEX_DIR = config('RELATED_INDEX_DIR', default=str(BASE_DIR / 'related_index'))
+RELATED_ITEMS_COUNT = 5
+RELATED_MAX_FEATURES = 4096
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
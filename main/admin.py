@@ -1,7 +1,7 @@
 from .models import ImpactStat
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Event, Story, BlogPost, Resource, Donation, Contact, Newsletter, ImpactStory, TeamMember, Comment, Supporter
+from .models import Event, Story, BlogPost, Resource, Donation, Contact, Newsletter, ImpactStory, TeamMember, Comment, Supporter, Tag
 
 
 @admin.register(ImpactStat)
@@ -110,6 +110,13 @@ class BlogPostAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'post_count')
+    search_fields = ('name',)
+    readonly_fields = ('post_count',)
+
+
 @admin.register(Resource)
 class ResourceAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'download_count', 'featured', 'created_at')
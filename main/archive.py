@@ -0,0 +1,72 @@
+"""
+Month-bucketed event archive.
+
+``EventMonth`` holds the number of active events per calendar month (in the
+site time zone). Saves and deletes recount only the months an event moved
+out of or into, each with a range scan on the partial ``date`` index, so the
+archive navigation never aggregates the whole events table.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import Event, EventMonth
+from .versions import bump_version, cached
+
+MONTHS_KEY = 'events:months'
+
+
+def month_of(value):
+    local = timezone.localtime(value) if timezone.is_aware(value) else value
+    return local.year, local.month
+
+
+def month_range(year, month):
+    """
+    Aware [start, end) datetimes bounding a calendar month; ValueError if the
+    month is invalid or its bounds are outside what ``datetime`` can hold
+    """
+    tz = timezone.get_current_timezone()
+    try:
+        start = datetime(year, month, 1, tzinfo=tz)
+        end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=tz)
+        # Queries compare in UTC, which must be representable too
+        start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+    except OverflowError as e:
+        raise ValueError(f'{year}-{month} is out of range') from e
+    return start, end
+
+
+def events_in_month(year, month):
+    start, end = month_range(year, month)
+    return Event.objects.filter(is_active=True, date__gte=start, date__lt=end)
+
+
+def recount(months):
+    for year, month in {m for m in months if m}:
+        count = events_in_month(year, month).count()
+        if count:
+            EventMonth.objects.update_or_create(year=year, month=month, defaults={'count': count})
+        else:
+            EventMonth.objects.filter(year=year, month=month).delete()
+    bump_version(EventMonth)
+
+
+def rebuild():
+    """Recount every month from scratch (backfill and repair)"""
+    tz = timezone.get_current_timezone()
+    rows = (
+        Event.objects.filter(is_active=True)
+        .annotate(y=ExtractYear('date', tzinfo=tz), m=ExtractMonth('date', tzinfo=tz))
+        .values('y', 'm').annotate(n=Count('pk')).order_by()
+    )
+    EventMonth.objects.all().delete()
+    EventMonth.objects.bulk_create(EventMonth(year=r['y'], month=r['m'], count=r['n']) for r in rows)
+    bump_version(EventMonth)
+
+
+def months():
+    """Every month with active events, newest first"""
+    return cached(MONTHS_KEY, [EventMonth], lambda: list(EventMonth.objects.all()))
@@ -0,0 +1,89 @@
+"""
+Async counterparts of Django's list and detail views.
+
+Under ASGI (``gywan_project.asgi``) these run on the event loop and read rows
+through the async ORM, so a slow query or outbound call no longer ties up a
+worker. Under WSGI Django runs them through ``async_to_sync`` unchanged.
+Templates are still rendered after the view returns, in a worker thread.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.utils.translation import gettext as _
+
+from . import slug_cache
+
+
+async def alist(queryset):
+    """Evaluate ``queryset`` with the async ORM"""
+    return [obj async for obj in queryset]
+
+
+class AsyncListMixin:
+    """``ListView.get`` with the page fetched through the async ORM"""
+
+    async def get_extra_context(self):
+        return {}
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        page_size = self.get_paginate_by(self.object_list)
+        if page_size:
+            self.paginated = await self.apaginate_queryset(self.object_list, page_size)
+        context = self.get_context_data()
+        context.update(await self.get_extra_context())
+        return self.render_to_response(context)
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.paginated
+
+    async def apaginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(
+            queryset, page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        paginator.count = await queryset.acount()
+        page = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        try:
+            page_number = int(page)
+        except ValueError:
+            if page != 'last':
+                raise Http404(_('Page is not “last”, nor can it be converted to an int.'))
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as e:
+            raise Http404(_('Invalid page (%(page_number)s): %(message)s') % {
+                'page_number': page_number, 'message': str(e),
+            })
+        page.object_list = await alist(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AsyncDetailMixin:
+    """``DetailView.get`` for slug URLs, with the object resolved through ``main.slug_cache``"""
+
+    # Models other than the view's own that the fetched object depends on
+    cache_depends_on = ()
+
+    async def get_extra_context(self):
+        return {}
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        try:
+            return await sync_to_async(slug_cache.resolve)(
+                queryset, slug, self.get_slug_field(), self.cache_depends_on,
+            )
+        except queryset.model.DoesNotExist:
+            raise Http404(_('No %(verbose_name)s found matching the query') % {
+                'verbose_name': queryset.model._meta.verbose_name,
+            })
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        context.update(await self.get_extra_context())
+        return self.render_to_response(context)
@@ -0,0 +1,200 @@
+"""
+Two-tier cache backend.
+
+Each process keeps a small LRU (L1) in front of a cache shared by every
+gunicorn worker (L2, the ``shared`` file-based cache by default). Reads are
+served from L1 when possible; writes and deletes go straight through to L2.
+
+L1 entries live at most ``L1_TIMEOUT`` seconds and are never invalidated
+across workers, so anything that must change as soon as content does is keyed
+on the per-model versions in ``main.versions``. Those version keys bypass L1
+and are always read from L2, which makes a single ``bump_version`` visible to
+every worker at once.
+
+Hit/miss counts are kept per process and added to shared counters in L2 every
+``STATS_FLUSH_EVERY`` lookups; ``manage.py cache_stats`` reports the
+(approximate) totals.
+"""
+import pickle
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+STATS = ('l1_hits', 'l2_hits', 'misses')
+STATS_PREFIX = 'cache-stats:'
+
+_missing = object()
+
+
+class _Store:
+    """L1 entries and counters, shared by every thread of a process"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.stats = Counter()
+        self.unflushed = Counter()
+
+
+# Django creates cache backends per thread; keep one store per L2 alias
+_stores = {}
+_stores_lock = Lock()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', location or 'shared')
+        self._max_entries = int(options.get('L1_MAX_ENTRIES', 500))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._bypass = tuple(options.get('L1_BYPASS', ('version:', STATS_PREFIX)))
+        self._flush_every = int(options.get('STATS_FLUSH_EVERY', 100))
+        with _stores_lock:
+            self._store = _stores.setdefault(self._l2_alias, _Store())
+        self._entries = self._store.entries
+        self._lock = self._store.lock
+
+    @cached_property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l1_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _uses_l1(self, key):
+        return not key.startswith(self._bypass)
+
+    # L1 -----------------------------------------------------------------
+
+    def _l1_get(self, l1_key):
+        with self._lock:
+            entry = self._entries.get(l1_key)
+            if entry is None:
+                return _missing
+            expires, data = entry
+            if expires <= time.monotonic():
+                del self._entries[l1_key]
+                return _missing
+            self._entries.move_to_end(l1_key)
+        return pickle.loads(data)
+
+    def _l1_set(self, l1_key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = self._l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            self._l1_discard(l1_key)
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[l1_key] = (time.monotonic() + ttl, data)
+            self._entries.move_to_end(l1_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _l1_discard(self, l1_key):
+        with self._lock:
+            self._entries.pop(l1_key, None)
+
+    # Stats --------------------------------------------------------------
+
+    def _take_unflushed(self):
+        pending = self._store.unflushed
+        self._store.unflushed = Counter()
+        return pending
+
+    def _count(self, stat):
+        store = self._store
+        with self._lock:
+            store.stats[stat] += 1
+            store.unflushed[stat] += 1
+            if sum(store.unflushed.values()) < self._flush_every:
+                return
+            pending = self._take_unflushed()
+        self._flush_stats(pending)
+
+    def _flush_stats(self, pending):
+        # Read-modify-write: concurrent flushes may drop a few counts
+        for stat, count in pending.items():
+            key = STATS_PREFIX + stat
+            self.l2.set(key, self.l2.get(key, 0) + count, None)
+
+    def stats(self):
+        """Hit/miss counts of this process"""
+        with self._lock:
+            return {stat: self._store.stats[stat] for stat in STATS}
+
+    def shared_stats(self):
+        """Hit/miss counts flushed by every process"""
+        with self._lock:
+            pending = self._take_unflushed()
+        self._flush_stats(pending)
+        return {stat: self.l2.get(STATS_PREFIX + stat, 0) for stat in STATS}
+
+    def reset_stats(self):
+        with self._lock:
+            self._store.stats.clear()
+            self._store.unflushed.clear()
+        self.l2.delete_many([STATS_PREFIX + stat for stat in STATS])
+
+    # Cache API ----------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        if not self._uses_l1(key):
+            return self.l2.get(key, default, version=version)
+        value = self._l1_get(l1_key)
+        if value is not _missing:
+            self._count('l1_hits')
+            return value
+        value = self.l2.get(key, _missing, version=version)
+        if value is _missing:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._l1_set(l1_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self._l1_key(key, version)
+        self.l2.set(key, value, timeout, version=version)
+        if self._uses_l1(key):
+            self._l1_set(l1_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self._l1_key(key, version)
+        added = self.l2.add(key, value, timeout, version=version)
+        if added and self._uses_l1(key):
+            self._l1_set(l1_key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._uses_l1(key) and self._l1_get(self._l1_key(key, version)) is not _missing:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.l2.clear()
+
+    def clear_local(self):
+        """Drop this process's L1 entries only"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,81 @@
+"""
+HTML minification and content-encoding helpers for dynamic responses.
+
+Brotli is optional: without the ``brotli`` package only gzip is offered.
+"""
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Whitespace inside these elements is significant
+_PROTECTED = re.compile(rb'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.S | re.I)
+_BLANK_LINES = re.compile(rb'\s*\n\s*')
+_SPACES = re.compile(rb'[ \t]{2,}')
+
+
+def minify_html(content):
+    """Collapse indentation and blank lines, leaving protected elements untouched"""
+    out = []
+    pos = 0
+    for match in _PROTECTED.finditer(content):
+        out.append(_minify_text(content[pos:match.start()]))
+        out.append(match.group(1))
+        pos = match.end()
+    out.append(_minify_text(content[pos:]))
+    return b''.join(out)
+
+
+def _minify_text(text):
+    return _SPACES.sub(b' ', _BLANK_LINES.sub(b'\n', text))
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """Pick the best supported encoding from an Accept-Encoding header, or None"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of byte chunks, flushing after each one"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
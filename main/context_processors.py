@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.contrib.auth.context_processors import PermWrapper
+from django.contrib.auth.models import AnonymousUser
 
 def site_context(request):
     """Add site-wide context variables"""
@@ -8,3 +10,17 @@ def site_context(request):
         'STRIPE_PUBLIC_KEY': getattr(settings, 'STRIPE_PUBLIC_KEY', ''),
         'DEBUG': settings.DEBUG,
     }
+
+
+def fast_path(request):
+    """Replace session-backed context on fast-path requests (see AnonymousFastPathMiddleware)"""
+    if not getattr(request, 'fast_path', False):
+        return {}
+    user = AnonymousUser()
+    return {
+        'user': user,
+        'perms': PermWrapper(user),
+        'messages': [],
+        # {% csrf_token %} renders nothing; base.html fetches a token on demand
+        'csrf_token': 'NOTPROVIDED',
+    }
@@ -0,0 +1,42 @@
+"""
+Helpers for turning inline template ``<style>`` blocks into static bundles.
+
+A bundle is named after the digest of its minified CSS, so identical blocks in
+different templates share one file and any edit produces a new, cache-busting
+name before whitenoise adds its own content hash.
+"""
+import hashlib
+import re
+
+BUNDLE_DIR = 'css/bundles'
+
+# Strings are kept verbatim, comments dropped, everything else squeezed
+_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)', re.S)
+_SPACE = re.compile(r'\s+')
+_PUNCT = re.compile(r'\s*([{};,>])\s*')
+_COLON = re.compile(r':\s+')
+
+
+def _squeeze(text):
+    text = _SPACE.sub(' ', text)
+    text = _PUNCT.sub(r'\1', text)
+    return _COLON.sub(':', text)
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace, leaving string literals intact"""
+    out = []
+    pos = 0
+    for match in _TOKENS.finditer(css):
+        out.append(_squeeze(css[pos:match.start()]))
+        if match.group(1):
+            out.append(match.group(1))
+        pos = match.end()
+    out.append(_squeeze(css[pos:]))
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def bundle_name(minified):
+    """Static path of the bundle holding ``minified``"""
+    digest = hashlib.sha1(minified.encode()).hexdigest()[:12]
+    return f'{BUNDLE_DIR}/{digest}.css'
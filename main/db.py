@@ -0,0 +1,56 @@
+"""
+Database plumbing: SQLite connection tuning and primary/replica routing.
+
+Reads go to the ``replica`` alias when one is configured. After a write
+(any unsafe request) the client is pinned to the primary for
+``REPLICA_PIN_SECONDS`` so it reads its own writes while the replica catches up.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def pin_to_primary(pinned=True):
+    """Send reads in the current request/task to the primary; returns a reset token"""
+    return _pinned.set(pinned)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def configure_sqlite(connection):
+    """Apply ``settings.SQLITE_PRAGMAS`` to a freshly opened SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the replica (unless pinned) and everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if REPLICA in settings.DATABASES and not is_pinned():
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,54 @@
+"""
+Precomputed facet counts for list-page filtering.
+
+Each facet is a (model, field) pair counted over active rows. Saving or
+deleting a row recounts only the old and new values it touched, using the
+partial (field, ...) WHERE is_active indexes, so list pages read their facet
+lists from ``FacetCount`` instead of running a GROUP BY per request.
+"""
+from django.db.models import Count
+
+from .models import Event, Story, Resource, FacetCount
+from .versions import bump_version, cached
+
+FACETS = {
+    'event.location': (Event, 'location'),
+    'story.location': (Story, 'location'),
+    'resource.category': (Resource, 'category'),
+}
+
+
+def facets_for(model):
+    return [(name, field) for name, (m, field) in FACETS.items() if m is model]
+
+
+def _cache_key(facet):
+    return f'facets:{facet}'
+
+
+def recount(facet, values):
+    """Refresh the stored counts of ``values`` for one facet"""
+    model, field = FACETS[facet]
+    for value in {v for v in values if v}:
+        count = model.objects.filter(is_active=True, **{field: value}).count()
+        if count:
+            FacetCount.objects.update_or_create(facet=facet, value=value, defaults={'count': count})
+        else:
+            FacetCount.objects.filter(facet=facet, value=value).delete()
+    bump_version(FacetCount)
+
+
+def rebuild(facet):
+    """Recount every value of a facet from scratch (backfill and repair)"""
+    model, field = FACETS[facet]
+    rows = model.objects.filter(is_active=True).exclude(**{field: ''}).values(field).annotate(n=Count('pk'))
+    FacetCount.objects.filter(facet=facet).delete()
+    FacetCount.objects.bulk_create(FacetCount(facet=facet, value=row[field], count=row['n']) for row in rows)
+    bump_version(FacetCount)
+
+
+def facet_counts(facet):
+    """``[{'value', 'count'}, ...]`` for a facet, most common first"""
+    return cached(_cache_key(facet), [FacetCount], lambda: list(
+        FacetCount.objects.filter(facet=facet).values('value', 'count')
+    ))
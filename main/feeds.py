@@ -0,0 +1,95 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .models import Event, Story, BlogPost
+
+FEED_SIZE = 20
+
+
+class BlogFeed(Feed):
+    title = 'GYWAN Blog & News'
+    link = reverse_lazy('blog')
+    description = 'Latest articles and updates from GYWAN.'
+
+    def items(self):
+        return BlogPost.objects.filter(published=True, is_active=True).select_related('author')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.get_username()
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return item.get_tags_list()
+
+
+class StoryFeed(Feed):
+    title = 'GYWAN Success Stories'
+    link = reverse_lazy('stories')
+    description = 'Stories from the girls and young women of our network.'
+
+    def items(self):
+        return Story.objects.filter(is_active=True)[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.content).words(60)
+
+    def item_author_name(self, item):
+        return item.author
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class EventFeed(Feed):
+    title = 'GYWAN Events'
+    link = reverse_lazy('events')
+    description = 'Workshops, conferences and programs from GYWAN.'
+
+    def items(self):
+        return Event.objects.filter(is_active=True)[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return f"{item.date:%B %d, %Y} - {item.location}\n\n{Truncator(item.description).words(60)}"
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class BlogAtomFeed(BlogFeed):
+    feed_type = Atom1Feed
+    subtitle = BlogFeed.description
+
+
+class StoryAtomFeed(StoryFeed):
+    feed_type = Atom1Feed
+    subtitle = StoryFeed.description
+
+
+class EventAtomFeed(EventFeed):
+    feed_type = Atom1Feed
+    subtitle = EventFeed.description
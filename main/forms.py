@@ -1,6 +1,7 @@
 from django import forms
 from django.core.validators import MinValueValidator
 from .models import Contact, Donation, Newsletter
+from .newsletter import normalize_email
 
 
 class ContactForm(forms.ModelForm):
@@ -85,3 +86,20 @@ class NewsletterForm(forms.ModelForm):
             'class': 'form-control',
             'placeholder': 'Your name (optional)'
         })
+
+
+class NewsletterSignupForm(NewsletterForm):
+    """
+    NewsletterForm for the buffered signup path: normalizes the email and
+    leaves duplicate detection to ``main.newsletter`` instead of the database.
+    """
+
+    def clean_email(self):
+        return normalize_email(self.cleaned_data['email'])
+
+    def validate_unique(self):
+        pass
+
+    def add_duplicate_error(self):
+        """The error NewsletterForm reports for an existing subscriber"""
+        self.add_error('email', self.instance.unique_error_message(Newsletter, ['email']))
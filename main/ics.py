@@ -0,0 +1,71 @@
+"""Minimal RFC 5545 serialization for streaming the events calendar"""
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+
+CRLF = '\r\n'
+
+
+def escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line into 75-octet chunks joined by CRLF + space"""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + CRLF
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # Never split a UTF-8 sequence
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode())
+        data = data[size:]
+    return (CRLF + ' ').join(parts) + CRLF
+
+
+def format_datetime(value):
+    return timezone.localtime(value, dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _header(name):
+    return ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//GYWAN//Events//EN', 'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape(name)}',
+    ))
+
+
+def _event(event, domain, url_for):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{domain}',
+        f'DTSTAMP:{format_datetime(event.updated_at)}',
+        f'DTSTART:{format_datetime(event.date)}',
+        f'SUMMARY:{escape(event.title)}',
+        f'LOCATION:{escape(event.location)}',
+        f'DESCRIPTION:{escape(event.description)}',
+        f'URL:{url_for(event)}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def calendar(events, name, domain, url_for):
+    """Yield a VCALENDAR one VEVENT at a time"""
+    yield _header(name)
+    for event in events:
+        yield _event(event, domain, url_for)
+    yield fold('END:VCALENDAR')
+
+
+async def acalendar(events, name, domain, url_for):
+    """``calendar()`` over an async iterable of events (ASGI streaming)"""
+    yield _header(name)
+    async for event in events:
+        yield _event(event, domain, url_for)
+    yield fold('END:VCALENDAR')
@@ -0,0 +1,278 @@
+"""
+Bulk content import from other CMSes.
+
+Rows are read one at a time from CSV, a JSON array or JSON Lines, validated
+with the model's own field validation and inserted with ``bulk_create`` in
+batches, so memory stays flat however large the export is:
+
+* slugs      every existing slug is loaded once; rows without one get
+             ``slugify(title)`` with ``-2``, ``-3``, ... on collision, while a
+             row whose explicit slug is taken is rejected (so re-running an
+             import does not duplicate it)
+* body text  rendered per row, as ``RenderedText.save()`` would
+* authors    ``author`` on blog posts is a username, resolved from one query
+* images     ``image`` is a URL or a path relative to the export file; images
+             are fetched, shrunk to ``IMAGE_MAX_SIZE`` and stored by a thread
+             pool while later batches insert, then attached with ``bulk_update``
+
+``bulk_create`` sends no signals, so ``finish()`` does once what the
+per-save handlers in ``main.signals`` would have done row by row. Related
+content is not rescored; run ``build_related`` after a large import.
+"""
+import csv
+import io
+import json
+import os
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from . import archive, facets, prerender, tags, versions
+from .models import Event, Story, BlogPost
+from .slugs import SlugAllocator
+
+MODELS = {'event': Event, 'story': Story, 'blog': BlogPost}
+
+# Longest side of an imported image, in pixels
+IMAGE_MAX_SIZE = 1600
+
+# Never taken from an export; maintained by the site itself
+SKIPPED_FIELDS = {'id', 'created_at', 'updated_at', 'body_html', 'summary', 'word_count'}
+
+TRUE_VALUES = {'1', 't', 'true', 'y', 'yes', 'on'}
+FALSE_VALUES = {'0', 'f', 'false', 'n', 'no', 'off'}
+
+
+def _json_array(fh, chunk_size=1 << 16):
+    """Yield the items of a JSON array without reading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = fh.read(chunk_size).lstrip()[1:]
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            more = fh.read(chunk_size)
+            if not more:
+                raise
+            buffer += more
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def read_rows(path, format=None):
+    """Yield the rows of a CSV, JSON array or JSON Lines export"""
+    format = format or ('csv' if path.lower().endswith('.csv') else 'json')
+    if format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            yield from csv.DictReader(fh)
+        return
+    with open(path, encoding='utf-8-sig') as fh:
+        first = fh.read(1)
+        while first.isspace():
+            first = fh.read(1)
+        fh.seek(0)
+        if first == '[':
+            yield from _json_array(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def fetch_image(source, name, storage, max_size=IMAGE_MAX_SIZE):
+    """Download or read ``source``, shrink it and store it as ``name``; returns the stored name"""
+    from PIL import Image
+
+    if source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source, timeout=30) as response:
+            data = response.read()
+    else:
+        with open(source, 'rb') as fh:
+            data = fh.read()
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = image.format if image.format in ('JPEG', 'PNG', 'WEBP', 'GIF') else 'JPEG'
+        if max(image.size) > max_size:
+            image.thumbnail((max_size, max_size))
+        elif image.format == image_format:
+            return storage.save(name, ContentFile(data))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, image_format)
+    return storage.save(name, ContentFile(output.getvalue()))
+
+
+class Importer:
+    """
+    Validate, insert and finish an import of one model. Rejected rows are
+    passed to ``reject(number, errors, row)``; ``number`` counts data rows
+    from 1.
+    """
+
+    def __init__(self, model, reject, batch_size=500, workers=8, base_dir='.', dry_run=False):
+        self.model = model
+        self.reject = reject
+        self.batch_size = batch_size
+        self.base_dir = base_dir
+        self.dry_run = dry_run
+        self.slugs = SlugAllocator(model)
+        self.fields = {
+            field.name: field for field in model._meta.concrete_fields
+            if field.editable and field.name not in SKIPPED_FIELDS
+        }
+        self.image_field = model._meta.get_field('image')
+        self._users = None
+        self.pool = ThreadPoolExecutor(workers)
+        self.images = []
+        self.tag_ids = set()
+        self.imported = 0
+        self.rejected = 0
+        self.failed_images = 0
+
+    def run(self, rows):
+        batch = []
+        for number, row in enumerate(rows, 1):
+            item = self.build(number, row)
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.insert(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+        self.attach_images()
+        if not self.dry_run and self.imported:
+            self.finish()
+
+    def users(self):
+        if self._users is None:
+            self._users = dict(User.objects.values_list('username', 'pk'))
+        return self._users
+
+    def _value(self, field, value):
+        if isinstance(field, models.BooleanField) and isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in TRUE_VALUES:
+                return True
+            if lowered in FALSE_VALUES:
+                return False
+        return value
+
+    def build(self, number, row):
+        """A validated, unsaved instance for ``row``, or None if it was rejected"""
+        if not isinstance(row, dict):
+            self._reject(number, {'__all__': ['Row is not an object']}, row)
+            return None
+        obj = self.model()
+        errors = {}
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if value is None or value == '' or name == 'image':
+                continue
+            if field.many_to_one:
+                # Only BlogPost.author is a foreign key: a username
+                pk = self.users().get(str(value).strip())
+                if pk is None:
+                    errors[name] = [f'No user named "{value}"']
+                setattr(obj, field.attname, pk)
+            else:
+                setattr(obj, name, self._value(field, value))
+        try:
+            obj.full_clean(exclude=['image', *errors], validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if not errors and obj.slug and not self.slugs.claim(obj.slug):
+            errors['slug'] = [f'Slug "{obj.slug}" is already in use']
+        if errors:
+            self._reject(number, errors, row)
+            return None
+
+        obj._generated_slug = not obj.slug
+        if obj._generated_slug:
+            obj.slug = self.slugs.allocate(obj.title)
+        for name, field in self.fields.items():
+            value = getattr(obj, field.attname)
+            if isinstance(field, models.DateTimeField) and value and timezone.is_naive(value):
+                setattr(obj, field.attname, timezone.make_aware(value))
+        obj.render_text()
+        obj._row = (number, row)
+        return obj
+
+    def _reject(self, number, errors, row):
+        self.rejected += 1
+        self.reject(number, errors, row)
+
+    def insert(self, batch):
+        if self.dry_run:
+            self.imported += len(batch)
+            return
+        try:
+            self._insert(batch)
+        except IntegrityError:
+            # A slug was taken since the allocator loaded them: reload and retry once
+            self.slugs = SlugAllocator(self.model)
+            for obj in batch:
+                if obj._generated_slug:
+                    obj.slug = self.slugs.allocate(obj.title)
+            try:
+                self._insert(batch)
+            except IntegrityError as e:
+                for obj in batch:
+                    number, row = obj._row
+                    self._reject(number, {'__all__': [str(e)]}, row)
+                return
+        self.imported += len(batch)
+        for obj in batch:
+            source = obj._row[1].get('image')
+            if source:
+                self.queue_image(obj, str(source))
+
+    def _insert(self, batch):
+        with transaction.atomic():
+            self.model.objects.bulk_create(batch)
+            if self.model is BlogPost:
+                self.tag_ids |= tags.link_post_tags(batch)
+
+    def queue_image(self, obj, source):
+        if not source.startswith(('http://', 'https://')):
+            source = os.path.join(self.base_dir, source)
+        extension = os.path.splitext(source.split('?')[0])[1].lower() or '.jpg'
+        name = self.image_field.generate_filename(obj, f'{obj.slug}{extension}')
+        future = self.pool.submit(fetch_image, source, name, self.image_field.storage)
+        self.images.append((obj.pk, obj._row, future))
+
+    def attach_images(self):
+        """Wait for the image pool and point the imported rows at their images"""
+        self.pool.shutdown(wait=True)
+        attached = []
+        for pk, (number, row), future in self.images:
+            try:
+                attached.append(self.model(pk=pk, image=future.result()))
+            except Exception as e:
+                # The row itself was imported
+                self.failed_images += 1
+                self.reject(number, {'image': [f'{type(e).__name__}: {e}']}, row)
+        self.model.objects.bulk_update(attached, ['image'], batch_size=500)
+        self.images = []
+
+    def finish(self):
+        """Recount and invalidate once for every row inserted without signals"""
+        if self.model is BlogPost:
+            tags.refresh_counts(self.tag_ids)
+        if self.model is Event:
+            archive.rebuild()
+        for name, _ in facets.facets_for(self.model):
+            facets.rebuild(name)
+        versions.bump_version(self.model)
+        prerender.queue_tags({prerender.model_tag(self.model)})
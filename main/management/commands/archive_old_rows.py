@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import retention
+
+
+class Command(BaseCommand):
+    help = 'Move comments, contact messages and donations past their retention period into compressed archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies', nargs='*', metavar='policy',
+                            help=f'Policies to apply (default: all of {", ".join(retention.POLICIES)})')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be moved')
+
+    def handle(self, *args, **options):
+        unknown = set(options['policies']) - set(retention.POLICIES)
+        if unknown:
+            raise CommandError(f'Unknown policy: {", ".join(sorted(unknown))}')
+        for name in options['policies'] or retention.POLICIES:
+            days = retention.retention_days(name)
+            if options['dry_run']:
+                count = retention.expired_rows(name).count()
+                self.stdout.write(f'{name}: {count} rows older than {days} days')
+                continue
+            moved = retention.archive(name, chunk_size=options['chunk_size'])
+            self.stdout.write(f'{name}: archived {moved} rows older than {days} days')
+        self.stdout.write(self.style.SUCCESS('Done'))
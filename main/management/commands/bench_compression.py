@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from main import compression
+
+DEFAULT_URLS = ['/', '/about/', '/donate/', '/events/', '/stories/', '/blog/', '/resources/']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark CPU cost against bytes saved for HTML minification and each compression level'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', default=DEFAULT_URLS)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        bodies = []
+        for url in options['urls']:
+            with override_settings(COMPRESSION_MINIFY_HTML=False):
+                response = client.get(url, HTTP_ACCEPT_ENCODING='identity', secure=not settings.DEBUG)
+            if response.status_code == 200:
+                bodies.append(response.content)
+            else:
+                self.stderr.write(f'Skipping {url}: HTTP {response.status_code}')
+        if not bodies:
+            return
+
+        iterations = options['iterations']
+        raw = sum(len(body) for body in bodies)
+        variants = [('minify only', None, None)]
+        variants += [('gzip', 'gzip', level) for level in (1, 6, 9)]
+        if 'br' in compression.available_encodings():
+            variants += [('brotli', 'br', level) for level in (1, 4, 9, 11)]
+
+        self.stdout.write(f'{len(bodies)} pages, {raw} bytes uncompressed, {iterations} iterations\n')
+        self.stdout.write(f'{"variant":<14}{"level":>6}{"bytes":>10}{"saved":>8}{"ms/page":>10}')
+        for label, encoding, level in variants:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                size = 0
+                for body in bodies:
+                    out = compression.minify_html(body)
+                    if encoding:
+                        out = compression.compress(out, encoding, level)
+                    size += len(out)
+            elapsed = (time.perf_counter() - started) * 1000 / (iterations * len(bodies))
+            saved = 100 * (1 - size / raw)
+            self.stdout.write(f'{label:<14}{level or "-":>6}{size:>10}{saved:>7.1f}%{elapsed:>10.3f}')
@@ -0,0 +1,98 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_URLS = ['/', '/events/', '/stories/', '/blog/', '/resources/']
+
+SERVERS = {
+    'gunicorn-sync': lambda workers, port: [
+        sys.executable, '-m', 'gunicorn', 'gywan_project.wsgi:application',
+        '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+    'uvicorn-asgi': lambda workers, port: [
+        sys.executable, '-m', 'uvicorn', 'gywan_project.asgi:application',
+        '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning',
+    ],
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'Server exited with status {process.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Server did not start on port {port}')
+
+
+def _fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+class Command(BaseCommand):
+    help = 'Load-test gunicorn sync workers against uvicorn (ASGI) workers at several concurrency levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=200, help='Requests per concurrency level')
+        parser.add_argument('--url', action='append', dest='urls', help='Path to request (repeatable)')
+        parser.add_argument('--server', choices=sorted(SERVERS), action='append', dest='servers')
+
+    def handle(self, *args, **options):
+        paths = options['urls'] or DEFAULT_URLS
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'gywan_project.settings')}
+        self.stdout.write(f'{"server":<15} {"conc":>5} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"errors":>7}')
+        for name in options['servers'] or list(SERVERS):
+            port = _free_port()
+            process = subprocess.Popen(SERVERS[name](options['workers'], port), env=env)
+            try:
+                _wait_until_up(port, process)
+                urls = [f'http://127.0.0.1:{port}{path}' for path in paths]
+                # Warm every worker before measuring
+                with ThreadPoolExecutor(options['workers'] * 2) as pool:
+                    list(pool.map(_fetch, urls * options['workers'] * 2))
+                for concurrency in options['concurrency']:
+                    self._run(name, urls, concurrency, options['requests'])
+            finally:
+                process.terminate()
+                process.wait()
+
+    def _run(self, name, urls, concurrency, total):
+        targets = [urls[i % len(urls)] for i in range(total)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(_fetch, targets))
+        elapsed = time.perf_counter() - start
+        timings = sorted(t for t, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{name:<15} {concurrency:>5} {total / elapsed:>9.1f} '
+            f'{statistics.median(timings) * 1000:>8.1f} {p95 * 1000:>8.1f} {errors:>7}'
+        )
@@ -0,0 +1,52 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import Context, engines
+
+from main.css import BUNDLE_DIR, minify_css, bundle_name
+from main.warmup import template_names
+from main.templatetags.css_bundles import CssBundleNode
+
+
+class Command(BaseCommand):
+    help = 'Collect {% cssbundle %} blocks from templates into minified static CSS files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Static source directory (default: first STATICFILES_DIRS entry)')
+        parser.add_argument('--clean', action='store_true', help='Remove bundles no template uses any more')
+
+    def handle(self, *args, **options):
+        static_dir = options['output'] or settings.STATICFILES_DIRS[0]
+        bundle_dir = os.path.join(static_dir, *BUNDLE_DIR.split('/'))
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        engine = engines['django'].engine
+        bundles = {}
+        blocks = raw_bytes = 0
+        for name in sorted(set(template_names(engine))):
+            nodelist = engine.get_template(name).nodelist
+            for node in nodelist.get_nodes_by_type(CssBundleNode):
+                css = node.nodelist.render(Context())
+                minified = minify_css(css)
+                bundles[bundle_name(minified)] = minified
+                blocks += 1
+                raw_bytes += len(css.encode())
+
+        for name, minified in bundles.items():
+            path = os.path.join(static_dir, *name.split('/'))
+            if not os.path.exists(path):
+                with open(path, 'w') as fh:
+                    fh.write(minified)
+
+        if options['clean']:
+            keep = {os.path.basename(name) for name in bundles}
+            for filename in os.listdir(bundle_dir):
+                if filename.endswith('.css') and filename not in keep:
+                    os.remove(os.path.join(bundle_dir, filename))
+
+        size = sum(len(css.encode()) for css in bundles.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{blocks} blocks -> {len(bundles)} bundles in {bundle_dir} ({raw_bytes} -> {size} bytes)'
+        ))
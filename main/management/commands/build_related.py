@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import related
+
+
+class Command(BaseCommand):
+    help = 'Rebuild TF-IDF related-content recommendations for events, stories and blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', type=int, default=None, help='Related items per object (default: RELATED_ITEMS_COUNT)')
+        parser.add_argument('--max-features', type=int, default=None, help='Vocabulary size (default: RELATED_MAX_FEATURES)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = related.build_index(k=options['k'], max_features=options['max_features'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Built related items for {count} objects in {time.monotonic() - started:.1f}s'
+        ))
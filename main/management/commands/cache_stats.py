@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Show L1/L2 hit and miss counts of the tiered cache, summed over all workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'shared_stats'):
+            raise CommandError('The default cache is not main.cache.TieredCache')
+        stats = cache.shared_stats()
+        lookups = sum(stats.values())
+        for stat, count in stats.items():
+            share = f'{count / lookups:.1%}' if lookups else '-'
+            self.stdout.write(f'{stat:<10} {count:>10}  {share:>6}')
+        self.stdout.write(f'{"lookups":<10} {lookups:>10}')
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
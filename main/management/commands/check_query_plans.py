@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from main.db import PRIMARY
+from main.query_plans import check, sample_urls
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN QUERY PLAN every query the public views run and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failures')
+
+    def handle(self, *args, **options):
+        connection = connections[PRIMARY]
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans only understands SQLite plans')
+
+        failures = []
+        for url, sql, plan, scans in check(connection, sample_urls()):
+            if scans:
+                failures.append((url, sql, plan))
+            elif options['verbose_plans']:
+                self.stdout.write(f'{url}\n  {sql}\n    ' + '\n    '.join(plan))
+
+        for url, sql, plan in failures:
+            self.stderr.write(f'{url}\n  {sql}\n    ' + '\n    '.join(plan))
+        if failures:
+            raise CommandError(f'{len(failures)} queries fall back to a full table scan')
+        self.stdout.write(self.style.SUCCESS('All view queries are index-backed'))
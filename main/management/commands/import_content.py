@@ -0,0 +1,56 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import importer
+
+
+class Command(BaseCommand):
+    help = 'Import events, stories or blog posts from a CSV, JSON or JSON Lines export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(importer.MODELS))
+        parser.add_argument('path', help='Export file; image paths in it are relative to its directory')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help='Threads fetching and resizing images')
+        parser.add_argument('--report', metavar='PATH', help='CSV of rejected rows (default: PATH.rejected.csv)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing to the database')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        report_path = options['report'] or f'{path}.rejected.csv'
+        model = importer.MODELS[options['model']]
+
+        with open(report_path, 'w', newline='') as report:
+            writer = csv.writer(report)
+            writer.writerow(['row', 'errors', 'data'])
+
+            def reject(number, errors, row):
+                messages = '; '.join(f'{field}: {" ".join(errs)}' for field, errs in errors.items())
+                writer.writerow([number, messages, json.dumps(row, default=str)])
+                if options['verbosity'] > 1:
+                    self.stderr.write(f'row {number}: {messages}')
+
+            job = importer.Importer(
+                model, reject,
+                batch_size=options['batch_size'], workers=options['workers'],
+                base_dir=os.path.dirname(os.path.abspath(path)), dry_run=options['dry_run'],
+            )
+            try:
+                job.run(importer.read_rows(path, options['format']))
+            except (ValueError, csv.Error) as e:
+                raise CommandError(f'{path} is not a valid {options["format"] or "export"} file: {e}')
+
+        action = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{action} {job.imported} {model._meta.verbose_name_plural.lower()}'))
+        if job.rejected or job.failed_images:
+            self.stdout.write(self.style.WARNING(
+                f'{job.rejected} rows rejected, {job.failed_images} images failed; see {report_path}'
+            ))
+        else:
+            os.remove(report_path)
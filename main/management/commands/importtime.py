@@ -0,0 +1,73 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before serving its first request
+BOOT_SCRIPT = (
+    'import django; django.setup(); '
+    'from gywan_project.wsgi import application; '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure():
+    """``{module: (self_us, cumulative_us, depth)}`` from ``python -X importtime``"""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'gywan_project.settings')}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative), len(indent) // 2)
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Report the import time of a cold worker boot, optionally compared with an earlier report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+        parser.add_argument('--save', metavar='PATH', help='Write the report as JSON')
+        parser.add_argument('--compare', metavar='PATH', help='Show changes against a saved report')
+
+    def handle(self, *args, **options):
+        modules = measure()
+        total = sum(self_us for self_us, _, _ in modules.values())
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as fh:
+                baseline = json.load(fh)
+
+        self.stdout.write(f'{len(modules)} modules, {total / 1000:.1f} ms total import time')
+        if baseline:
+            delta = total - baseline['total_us']
+            self.stdout.write(f'  {delta / 1000:+.1f} ms against {options["compare"]}')
+
+        self.stdout.write(f'\n{"cumulative ms":>13} {"self ms":>8}  top-level module')
+        top_level = sorted(
+            ((name, info) for name, info in modules.items() if info[2] == 0),
+            key=lambda item: item[1][1], reverse=True,
+        )
+        for name, (self_us, cumulative, _) in top_level[:options['top']]:
+            line = f'{cumulative / 1000:>13.1f} {self_us / 1000:>8.1f}  {name}'
+            if baseline:
+                before = baseline['modules'].get(name)
+                line += '  (new)' if before is None else f'  ({(cumulative - before[1]) / 1000:+.1f})'
+            self.stdout.write(line)
+
+        if options['save']:
+            with open(options['save'], 'w') as fh:
+                json.dump({'total_us': total, 'modules': modules}, fh, indent=1, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'Saved report to {options["save"]}'))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import prerender
+
+
+class Command(BaseCommand):
+    help = 'Render every public page to static HTML under PRERENDER_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Output directory (default: PRERENDER_ROOT)')
+        parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--pending', action='store_true',
+                            help='Only re-render pages affected by changes queued since the last run (for cron)')
+
+    def handle(self, *args, **options):
+        root = options['output'] or settings.PRERENDER_ROOT
+        started = time.monotonic()
+        if options['pending']:
+            results = prerender.render_queued(root=str(root), jobs=options['jobs'] or 1)
+        else:
+            results = prerender.prerender_site(root=str(root), jobs=options['jobs'])
+        failed = [(url, status) for url, status in results if status != 200]
+        for url, status in failed:
+            self.stderr.write(f'{url}: HTTP {status}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(results) - len(failed)} pages to {root} in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from main import template_profiling
+from main.query_plans import sample_urls
+
+
+class Command(BaseCommand):
+    help = 'Time template, include and block renders across the public pages and list fragments worth caching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', dest='urls', help='Path to request (repeatable)')
+        parser.add_argument('--rounds', type=int, default=3, help='Times to request each page')
+        parser.add_argument('--top', type=int, default=25, help='Number of rows to list')
+        parser.add_argument('--kind', choices=template_profiling.KINDS, action='append', dest='kinds')
+        parser.add_argument('--order', choices=['total', 'own', 'calls'], default='own')
+
+    def handle(self, *args, **options):
+        template_profiling.install()
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        urls = options['urls'] or sample_urls()
+        # Load templates and fill caches before measuring
+        for url in urls:
+            client.get(url, secure=not settings.DEBUG)
+
+        totals = template_profiling.Profile()
+        for _ in range(options['rounds']):
+            for url in urls:
+                with template_profiling.collect() as profile:
+                    client.get(url, secure=not settings.DEBUG)
+                totals.merge(profile)
+
+        requests = len(urls) * options['rounds']
+        self.stdout.write(f'{requests} requests over {len(urls)} pages\n')
+        self.stdout.write(f'{"calls":>7} {"total ms":>9} {"own ms":>8} {"avg ms":>7}  {"kind":<8} name')
+        rows = totals.rows(options['kinds'] or template_profiling.KINDS, options['order'])
+        for kind, name, stat in rows[:options['top']]:
+            self.stdout.write(
+                f'{stat.calls:>7} {stat.total * 1000:>9.1f} {stat.own * 1000:>8.1f} '
+                f'{stat.total / stat.calls * 1000:>7.2f}  {kind:<8} {name}'
+            )
+
+        candidates = totals.candidates()
+        if not candidates:
+            self.stdout.write('\nNo include or block rendered the same output in every request')
+            return
+        self.stdout.write('\nSame output in every request that rendered it (candidates for {% cache %}):')
+        self.stdout.write(f'{"requests":>8} {"ms/request":>10}  {"kind":<8} name')
+        for kind, name, stat in candidates[:options['top']]:
+            self.stdout.write(f'{stat.requests:>8} {stat.total / stat.requests * 1000:>10.2f}  {kind:<8} {name}')
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from main import retention
+
+
+class Command(BaseCommand):
+    help = 'Print archived rows as JSON lines, filtered by month and field values, or restore them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('policy', choices=list(retention.POLICIES))
+        parser.add_argument('--since', metavar='YYYY-MM', help='First month to read')
+        parser.add_argument('--until', metavar='YYYY-MM', help='Last month to read')
+        parser.add_argument('--where', action='append', default=[], metavar='FIELD=VALUE',
+                            help='Only rows whose field equals the value (repeatable; "pk" allowed)')
+        parser.add_argument('--contains', metavar='TEXT', help='Only rows with TEXT in any field')
+        parser.add_argument('--restore', action='store_true', help='Insert the matching rows back into the database')
+
+    def handle(self, *args, **options):
+        try:
+            where = dict(condition.split('=', 1) for condition in options['where'])
+        except ValueError:
+            raise CommandError('--where takes FIELD=VALUE')
+        text = (options['contains'] or '').lower()
+
+        def matches(record):
+            values = {'pk': record['pk'], **record['fields']}
+            if any(str(values.get(name)) != value for name, value in where.items()):
+                return False
+            return not text or any(text in str(value).lower() for value in values.values())
+
+        model = retention.POLICIES[options['policy']].model
+        records = (r for r in retention.read(model, options['since'], options['until']) if matches(r))
+        if options['restore']:
+            restored = retention.restore(records)
+            self.stdout.write(self.style.SUCCESS(f'Restored {restored} rows'))
+            return
+        for record in records:
+            self.stdout.write(json.dumps(record, cls=DjangoJSONEncoder))
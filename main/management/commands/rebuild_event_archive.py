@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main import archive
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-month event buckets behind /events/<year>/<month>/'
+
+    def handle(self, *args, **options):
+        archive.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{len(archive.months())} months with events'))
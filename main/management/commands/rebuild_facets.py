@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main import facets
+
+
+class Command(BaseCommand):
+    help = 'Recount every facet value for the story, event and resource list filters'
+
+    def handle(self, *args, **options):
+        for name in facets.FACETS:
+            facets.rebuild(name)
+            self.stdout.write(f'{name}: {len(facets.facet_counts(name))} values')
+        self.stdout.write(self.style.SUCCESS('Facet counts rebuilt'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Event, Story, BlogPost, Resource
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Re-render the stored HTML, summary and word count of events, stories, posts and resources'
+
+    def handle(self, *args, **options):
+        for model in (Event, Story, BlogPost, Resource):
+            batch, count = [], 0
+            for obj in model.objects.only('pk', model.rendered_field).iterator(chunk_size=BATCH_SIZE):
+                obj.render_text()
+                batch.append(obj)
+                if len(batch) >= BATCH_SIZE:
+                    count += self._flush(model, batch)
+            count += self._flush(model, batch)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS('Rendered text rebuilt'))
+
+    def _flush(self, model, batch):
+        model.objects.bulk_update(batch, ['body_html', 'summary', 'word_count'])
+        count = len(batch)
+        batch.clear()
+        return count
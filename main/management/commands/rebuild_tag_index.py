@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from main.models import BlogPost, Tag
+from main.tags import sync_post_tags, refresh_counts
+
+
+class Command(BaseCommand):
+    help = 'Populate the normalized tag index from every BlogPost.tags field and recount tags'
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.only('pk', 'tags').iterator(chunk_size=500)
+        count = 0
+        for post in posts:
+            sync_post_tags(post)
+            count += 1
+        # Catch tags no post references any more
+        refresh_counts(list(Tag.objects.values_list('pk', flat=True)))
+        self.stdout.write(self.style.SUCCESS(f'Indexed tags for {count} posts ({Tag.objects.count()} tags)'))
@@ -0,0 +1,217 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.utils.cache import has_vary_header, patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import compression, db, template_profiling
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'application/json', 'text/calendar',
+    'application/xml', 'application/rss+xml', 'application/atom+xml',
+)
+
+# (encoding -> level) for responses compressed on every request, and for
+# cacheable responses whose compressed body is stored and reused
+FAST_LEVELS = {'br': 4, 'gzip': 6}
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def _is_cacheable(request, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return False
+    # A page carrying a per-request CSRF token never repeats byte-for-byte
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or request.META.get('CSRF_COOKIE_USED'):
+        return False
+    cache_control = response.get('Cache-Control', '')
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return False
+    return not response.cookies
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Minify HTML and compress HTML, JSON, calendar and XML feed responses with brotli or gzip.
+
+    Compressed bodies of cacheable responses are stored in the cache keyed by
+    a digest of the uncompressed body, so repeated hits on unchanged pages
+    skip recompression and can afford a higher compression level.
+    """
+    min_size = 200
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        if response.streaming:
+            if encoding is None or response.is_async:
+                return response
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, FAST_LEVELS[encoding]
+            )
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            if content_type == 'text/html' and getattr(settings, 'COMPRESSION_MINIFY_HTML', True):
+                content = compression.minify_html(content)
+                response.content = content
+                if response.has_header('Content-Length'):
+                    response.headers['Content-Length'] = str(len(content))
+            if encoding is None:
+                return response
+            compressed = self._compress(content, encoding, _is_cacheable(request, response))
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compress(self, content, encoding, cacheable):
+        if not cacheable:
+            return compression.compress(content, encoding, FAST_LEVELS[encoding])
+        key = f'compressed:{encoding}:{hashlib.sha1(content).hexdigest()}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compression.compress(content, encoding, CACHED_LEVELS[encoding])
+            cache.set(key, compressed, getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 3600))
+        return compressed
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin reads to the primary database for unsafe requests, and for
+    ``REPLICA_PIN_SECONDS`` afterwards via a cookie, so users see their own
+    comments, donations and subscriptions immediately.
+    """
+    cookie_name = 'pin_primary'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        unsafe = self._is_unsafe(request)
+        token = db.pin_to_primary(unsafe or self.cookie_name in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            db.unpin(token)
+        return self._process_response(unsafe, response)
+
+    async def __acall__(self, request):
+        unsafe = self._is_unsafe(request)
+        token = db.pin_to_primary(unsafe or self.cookie_name in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db.unpin(token)
+        return self._process_response(unsafe, response)
+
+    def _is_unsafe(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def _process_response(self, unsafe, response):
+        if unsafe:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def is_fast_path(request):
+    """Anonymous GET/HEAD without session or pending messages, outside excluded paths"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.COOKIES.get(settings.SESSION_COOKIE_NAME) or request.COOKIES.get(CookieStorage.cookie_name):
+        return False
+    return not request.path.startswith(tuple(settings.FAST_PATH_EXCLUDE))
+
+
+class AnonymousFastPathMiddleware:
+    """
+    Serve anonymous reads without touching the session or the CSRF cookie.
+
+    Fast-path requests get an anonymous user, no messages and no CSRF token in
+    their templates (see ``main.context_processors.fast_path``); forms fetch a
+    token from ``/csrf/`` when they are used. Nothing then reads the session,
+    so the response has no ``Vary: Cookie`` or ``Set-Cookie`` and is marked
+    cacheable by shared proxies. Must come before ``SessionMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.fast_path = is_fast_path(request)
+        return self._process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        request.fast_path = is_fast_path(request)
+        return self._process_response(request, await self.get_response(request))
+
+    def _process_response(self, request, response):
+        if request.fast_path and self._is_public(response):
+            patch_cache_control(response, public=True, max_age=settings.FAST_PATH_MAX_AGE)
+        return response
+
+    def _is_public(self, response):
+        if response.status_code != 200 or response.cookies or has_vary_header(response, 'Cookie'):
+            return False
+        cache_control = response.get('Cache-Control', '')
+        return not any(word in cache_control for word in ('private', 'no-cache', 'no-store', 'max-age'))
+
+
+class TemplateProfilingMiddleware:
+    """
+    Profile template, include and block renders and append the table to HTML
+    pages (``TEMPLATE_PROFILING`` only). Profiled pages are never cached by
+    shared proxies. Place it after ``CompressionMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        template_profiling.install()
+
+    def __call__(self, request):
+        with template_profiling.collect() as profile:
+            response = self.get_response(request)
+        if not profile.stats or response.streaming:
+            return response
+        if response.get('Content-Type', '').split(';')[0].strip() != 'text/html':
+            return response
+        content = response.content
+        end = content.rfind(b'</body>')
+        if end != -1:
+            response.content = content[:end] + template_profiling.overlay(profile).encode() + content[end:]
+            if response.has_header('Content-Length'):
+                response.headers['Content-Length'] = str(len(response.content))
+        patch_cache_control(response, private=True)
+        return response
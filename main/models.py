@@ -1,10 +1,12 @@
+from asgiref.sync import sync_to_async
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.utils.text import slugify
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from .slugs import unique_slug
+
 # Base model
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -14,6 +16,46 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+class RenderedTextQuerySet(models.QuerySet):
+    def without_body(self):
+        """Skip loading the body and its rendered HTML (list pages)"""
+        return self.defer(self.model.rendered_field, 'body_html')
+
+
+# Rendered long-form text, refreshed on save (see main.rendering)
+class RenderedText(models.Model):
+    body_html = models.TextField(blank=True, editable=False)
+    summary = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Field rendered into the columns above
+    rendered_field = 'content'
+
+    objects = RenderedTextQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        from .rendering import render_fields
+        for name, value in render_fields(getattr(self, self.rendered_field)).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.render_text()
+        elif self.rendered_field in update_fields:
+            self.render_text()
+            kwargs['update_fields'] = {*update_fields, 'body_html', 'summary', 'word_count'}
+        super().save(*args, **kwargs)
+
+    @property
+    def reading_time(self):
+        """Estimated reading time in minutes"""
+        from .rendering import reading_minutes
+        return reading_minutes(self.word_count)
+
 # Team Member
 class TeamMember(BaseModel):
     name = models.CharField(max_length=100)
@@ -64,7 +106,7 @@ class ImpactStat(BaseModel):
         return f"{self.label}: {self.value}"
 
 # Event
-class Event(BaseModel):
+class Event(RenderedText, BaseModel):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField()
@@ -78,24 +120,48 @@ class Event(BaseModel):
     featured = models.BooleanField(default=False)
     registration_url = models.URLField(blank=True)
 
+    rendered_field = 'description'
+
     class Meta:
         ordering = ['-date']
         verbose_name = 'Event'
         verbose_name_plural = 'Events'
+        indexes = [
+            models.Index(fields=['date'], condition=models.Q(is_active=True), name='event_active_date_idx'),
+            models.Index(fields=['location', 'date'], condition=models.Q(is_active=True), name='event_location_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = unique_slug(self, self.title)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('event_detail', kwargs={'slug': self.slug})
 
+# Event month buckets (maintained by main.archive)
+class EventMonth(models.Model):
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='unique_event_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} ({self.count})"
+
+    def get_absolute_url(self):
+        return reverse('event_archive_month', kwargs={'year': self.year, 'month': self.month})
+
 # Story
-class Story(BaseModel):
+class Story(RenderedText, BaseModel):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     content = models.TextField()
@@ -112,20 +178,42 @@ class Story(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Story'
         verbose_name_plural = 'Stories'
+        indexes = [
+            models.Index(fields=['created_at'], condition=models.Q(is_active=True), name='story_active_created_idx'),
+            models.Index(fields=['location', 'created_at'], condition=models.Q(is_active=True), name='story_location_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = unique_slug(self, self.title)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('story_detail', kwargs={'slug': self.slug})
 
+# Tag
+class Tag(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=60, unique=True)
+    # Live (published, active) posts carrying this tag; kept current by main.tags
+    post_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        ordering = ['-post_count', 'name']
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('blog_tag', kwargs={'slug': self.slug})
+
 # Blog Post
-class BlogPost(BaseModel):
+class BlogPost(RenderedText, BaseModel):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     content = models.TextField()
@@ -136,7 +224,9 @@ class BlogPost(BaseModel):
     instagram_url = models.URLField(blank=True)
     youtube_url = models.URLField(blank=True)
     twitter_url = models.URLField(blank=True)
-    tags = models.CharField(max_length=200, blank=True)
+    tags = models.CharField(max_length=200, blank=True, help_text="Comma-separated")
+    # Normalized copy of `tags`, rebuilt on save
+    tag_index = models.ManyToManyField(Tag, blank=True, editable=False, related_name='posts')
     featured = models.BooleanField(default=False)
     published = models.BooleanField(default=True)
 
@@ -144,23 +234,36 @@ class BlogPost(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(published=True, is_active=True),
+                name='blog_live_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = unique_slug(self, self.title)
         super().save(*args, **kwargs)
+        from .tags import sync_post_tags
+        sync_post_tags(self)
 
     def get_absolute_url(self):
         return reverse('blog_detail', kwargs={'slug': self.slug})
 
     def get_tags_list(self):
-        return [tag.strip() for tag in self.tags.split(',')] if self.tags else []
+        if getattr(self, '_tags_source', None) != self.tags:
+            from .tags import parse_tags
+            self._tags_list = parse_tags(self.tags)
+            self._tags_source = self.tags
+        return self._tags_list
 
 # Resource
-class Resource(BaseModel):
+class Resource(RenderedText, BaseModel):
     CATEGORY_CHOICES = [
         ('guide', 'Guides'),
         ('report', 'Reports'),
@@ -177,14 +280,39 @@ class Resource(BaseModel):
     download_count = models.PositiveIntegerField(default=0)
     featured = models.BooleanField(default=False)
 
+    rendered_field = 'description'
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Resource'
         verbose_name_plural = 'Resources'
+        indexes = [
+            models.Index(fields=['created_at'], condition=models.Q(is_active=True), name='resource_active_created_idx'),
+            models.Index(
+                fields=['category', 'created_at'],
+                condition=models.Q(is_active=True),
+                name='resource_category_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+# Facet counts (maintained by main.facets)
+class FacetCount(models.Model):
+    facet = models.CharField(max_length=50)
+    value = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['facet', '-count', 'value']
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='unique_facet_value'),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
 # Donation
 class Donation(BaseModel):
     DONATION_TYPES = [
@@ -204,6 +332,9 @@ class Donation(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Donation'
         verbose_name_plural = 'Donations'
+        indexes = [
+            models.Index(fields=['created_at'], name='donation_created_idx'),
+        ]
 
     def __str__(self):
         return f"${self.amount} - {self.donor_name}"
@@ -220,6 +351,9 @@ class Contact(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Contact Message'
         verbose_name_plural = 'Contact Messages'
+        indexes = [
+            models.Index(fields=['created_at'], name='contact_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.name}"
@@ -259,5 +393,45 @@ class Comment(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='comment_created_idx'),
+            models.Index(fields=['content_type', 'object_id', 'created_at'], name='comment_target_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.text[:50]}"
+
+# Related content (precomputed by the build_related command)
+class RelatedItem(models.Model):
+    source_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    source_id = models.PositiveIntegerField()
+    target_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    target_id = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Denormalized so a detail page renders its list from this table alone
+    title = models.CharField(max_length=200)
+    url = models.CharField(max_length=255)
+    kind = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['source_type', 'source_id', 'rank'], name='related_source_idx'),
+            models.Index(fields=['target_type', 'target_id'], name='related_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type.model}:{self.source_id} -> {self.title}"
+
+    @classmethod
+    def for_object(cls, obj):
+        """Precomputed related items for ``obj``, best first, in one indexed query"""
+        source_type = ContentType.objects.get_for_model(obj)
+        return list(cls.objects.filter(source_type=source_type, source_id=obj.pk).only('title', 'url', 'kind'))
+
+    @classmethod
+    async def afor_object(cls, obj):
+        source_type = await sync_to_async(ContentType.objects.get_for_model)(obj)
+        return [item async for item in cls.objects.filter(source_type=source_type, source_id=obj.pk).only('title', 'url', 'kind')]
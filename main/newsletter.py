@@ -0,0 +1,124 @@
+"""
+Newsletter signup ingestion.
+
+Signup bursts mostly repeat addresses. Each process remembers the (normalized)
+addresses it has seen subscribed, so a repeat is answered without a query;
+any other address is checked with one case-insensitive lookup, since another
+worker may have added it (or it was stored before signups were lowercased). New signups are buffered and written with one
+``bulk_create(ignore_conflicts=True)`` per ``NEWSLETTER_BATCH_SIZE`` signups
+or ``NEWSLETTER_FLUSH_SECONDS``, whichever comes first. A buffered signup is
+lost if the worker is killed before the flush; set
+``NEWSLETTER_BATCH_SIZE = 1`` to write every signup immediately. A failed
+flush is logged and retried, never raised into the request that triggered it.
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Newsletter
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Exact addresses this process knows are subscribed, most recent last
+KNOWN_LIMIT = 10000
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+_lock = threading.RLock()
+_known = OrderedDict()
+_pending = {}
+_timer = None
+
+
+def _remember(email):
+    with _lock:
+        _known[email] = True
+        _known.move_to_end(email)
+        while len(_known) > KNOWN_LIMIT:
+            _known.popitem(last=False)
+
+
+def forget(email):
+    """Drop a deleted subscriber from this process's exact cache"""
+    with _lock:
+        _known.pop(normalize_email(email), None)
+
+
+def is_subscribed(email):
+    with _lock:
+        if email in _known or email in _pending:
+            return True
+    if Newsletter.objects.filter(email__iexact=email).exists():
+        _remember(email)
+        return True
+    return False
+
+
+def subscribe(email, name=''):
+    """Queue a signup; False if ``email`` (already normalized) is subscribed"""
+    if is_subscribed(email):
+        return False
+    with _lock:
+        _pending[email] = name
+        full = len(_pending) >= getattr(settings, 'NEWSLETTER_BATCH_SIZE', 50)
+        if not full:
+            _schedule_flush()
+    if full:
+        flush()
+    return True
+
+
+def _schedule_flush():
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(getattr(settings, 'NEWSLETTER_FLUSH_SECONDS', 1.0), _flush_in_background)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _flush_in_background():
+    try:
+        flush()
+    finally:
+        # The timer thread opened its own connection
+        connections.close_all()
+
+
+def flush():
+    """Write buffered signups; returns how many were written (0 on failure)"""
+    global _pending, _timer
+    with _lock:
+        batch, _pending = _pending, {}
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not batch:
+        return 0
+    try:
+        Newsletter.objects.bulk_create(
+            [Newsletter(email=email, name=name) for email, name in batch.items()],
+            ignore_conflicts=True, batch_size=500,
+        )
+    except Exception:
+        # Keep the signups for the next attempt; the caller is usually an unrelated request
+        logger.exception('Could not write %d newsletter signups; retrying', len(batch))
+        with _lock:
+            _pending = {**batch, **_pending}
+            _schedule_flush()
+        return 0
+    for email in batch:
+        _remember(email)
+    # bulk_create sends no post_save
+    bump_version(Newsletter)
+    return len(batch)
+
+
+atexit.register(flush)
@@ -0,0 +1,348 @@
+"""
+Static pre-rendering of public pages.
+
+Every public URL is rendered to an HTML file under ``settings.PRERENDER_ROOT``
+so nginx can serve it without touching Django. Each page records the content
+it depends on as a set of tags:
+
+* ``main.blogpost``   - any change to the model (list pages, homepage)
+* ``main.blogpost:5`` - a change to one object (its detail page)
+
+A manifest mapping URL -> tags is written next to the HTML, which lets a
+single save re-render only the pages that actually show the changed object.
+
+Saves never render in the request: they append their tags to a queue file
+next to the manifest, which ``prerender_site --pending`` (run from cron)
+drains. Saves that only bump a counter (``COUNTER_FIELDS``) are not queued;
+the next re-render of the page picks the new value up. The homepage also goes
+stale with time alone, as its upcoming events start; ``--pending`` re-renders
+it then too (see ``expired_tags``).
+"""
+import fcntl
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.utils import timezone
+
+from .models import (
+    Event, Story, BlogPost, Resource, ImpactStat, ImpactStory, TeamMember,
+    Supporter, Comment, Tag, RelatedItem,
+)
+
+MANIFEST_NAME = '.prerender-manifest.json'
+QUEUE_NAME = '.prerender-queue'
+
+# Models whose changes can affect pre-rendered output
+TRACKED_MODELS = (
+    Event, Story, BlogPost, Resource, ImpactStat, ImpactStory, TeamMember,
+    Supporter, Comment,
+)
+
+# Fields whose updates alone do not trigger a re-render
+COUNTER_FIELDS = {'download_count'}
+
+# The list pages' sidebar shows this many of the newest comments (see views)
+RECENT_COMMENTS = 10
+RECENT_COMMENTS_TAG = 'main.comment:recent'
+
+# The homepage lists events that have not started yet
+UPCOMING_EVENTS_TAG = 'main.event:upcoming'
+# Covers the gap between the homepage's query and its file being written
+RENDER_MARGIN = timedelta(seconds=10)
+
+
+def model_tag(model):
+    """Tag for any change to ``model``"""
+    return model._meta.label_lower
+
+
+def object_tag(model, pk):
+    """Tag for a change to a single ``model`` row"""
+    return f'{model._meta.label_lower}:{pk}'
+
+
+def only_counters(update_fields):
+    return bool(update_fields) and set(update_fields) <= COUNTER_FIELDS
+
+
+def recent_comment_ids():
+    return set(Comment.objects.order_by('-created_at').values_list('pk', flat=True)[:RECENT_COMMENTS])
+
+
+def _is_recent(comment, recent_ids):
+    if recent_ids is not None:
+        return comment.pk in recent_ids
+    if comment.created_at is None:
+        return True
+    # Works for deleted comments too: were fewer than RECENT_COMMENTS newer?
+    newer = Comment.objects.filter(created_at__gt=comment.created_at).exclude(pk=comment.pk)
+    return newer[:RECENT_COMMENTS].count() < RECENT_COMMENTS
+
+
+def tags_for_instance(instance, recent_ids=None):
+    """
+    Tags dirtied by saving or deleting ``instance``. For comments,
+    ``recent_ids`` (from ``recent_comment_ids()``) saves a query per row.
+    """
+    tags = {model_tag(type(instance))}
+    if isinstance(instance, Comment):
+        # A comment shows up on the detail page of the object it targets, and
+        # in the list pages' sidebar while it is among the newest
+        if instance.content_type_id and instance.object_id:
+            target = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+            if target is not None:
+                tags.add(object_tag(target, instance.object_id))
+        if _is_recent(instance, recent_ids):
+            tags.add(RECENT_COMMENTS_TAG)
+    else:
+        tags.add(object_tag(type(instance), instance.pk))
+    return tags
+
+
+def _num_pages(queryset, per_page):
+    return max(1, math.ceil(queryset.count() / per_page))
+
+
+def _paginated(path, queryset, per_page, deps):
+    for number in range(1, _num_pages(queryset, per_page) + 1):
+        url = path if number == 1 else f'{path}?page={number}'
+        yield url, deps
+
+
+def _related_tags():
+    """``{(source label, source pk): {object tags of its related items}}``"""
+    tags = {}
+    rows = RelatedItem.objects.select_related('source_type', 'target_type').values_list(
+        'source_type__app_label', 'source_type__model', 'source_id',
+        'target_type__app_label', 'target_type__model', 'target_id',
+    )
+    for src_app, src_model, src_id, dst_app, dst_model, dst_id in rows:
+        tags.setdefault((f'{src_app}.{src_model}', src_id), set()).add(f'{dst_app}.{dst_model}:{dst_id}')
+    return tags
+
+
+def _detail_pages(model, queryset, related):
+    for pk, url in ((obj.pk, obj.get_absolute_url()) for obj in queryset.only('pk', 'slug')):
+        # A detail page also shows the titles of its related items
+        yield url, {object_tag(model, pk)} | related.get((model_tag(model), pk), set())
+
+
+def collect_pages():
+    """Return ``{url: set(tags)}`` for every public page"""
+    from django.urls import reverse
+    from . import archive, views
+
+    events = Event.objects.filter(is_active=True)
+    stories = Story.objects.filter(is_active=True)
+    posts = BlogPost.objects.filter(published=True, is_active=True)
+    resources = Resource.objects.filter(is_active=True)
+
+    comment = RECENT_COMMENTS_TAG
+    pages = {
+        reverse('home'): {
+            model_tag(Event), UPCOMING_EVENTS_TAG, model_tag(Story), model_tag(Resource), model_tag(ImpactStat),
+        },
+        reverse('about'): {model_tag(TeamMember)},
+        reverse('our_team'): {model_tag(TeamMember), model_tag(Supporter)},
+        reverse('contact'): set(),
+        reverse('donate'): {model_tag(ImpactStory)},
+    }
+    listings = [
+        (reverse('events'), events, views.EventListView, Event),
+        (reverse('stories'), stories, views.StoryListView, Story),
+        (reverse('blog'), posts, views.BlogListView, BlogPost),
+        (reverse('resources'), resources, views.ResourceListView, Resource),
+    ]
+    for path, queryset, view, model in listings:
+        pages.update(_paginated(path, queryset, view.paginate_by, {model_tag(model), comment}))
+    for tag in Tag.objects.filter(post_count__gt=0).only('slug'):
+        pages.update(_paginated(tag.get_absolute_url(), posts.filter(tag_index=tag),
+                                views.BlogTagView.paginate_by, {model_tag(BlogPost), comment}))
+    for bucket in archive.months():
+        month_events = archive.events_in_month(bucket.year, bucket.month)
+        pages.update(_paginated(bucket.get_absolute_url(), month_events,
+                                views.EventMonthArchiveView.paginate_by, {model_tag(Event), comment}))
+    related = _related_tags()
+    for model, queryset in ((Event, events), (Story, stories), (BlogPost, posts)):
+        pages.update(_detail_pages(model, queryset, related))
+    return pages
+
+
+def output_path(url, root=None):
+    """Map a URL to its file under ``root``; ``/blog/?page=2`` -> ``blog/page-2.html``"""
+    root = root or settings.PRERENDER_ROOT
+    path, _, query = url.partition('?')
+    directory = os.path.join(root, *[part for part in path.split('/') if part])
+    if query.startswith('page='):
+        return os.path.join(directory, f'page-{query[5:]}.html')
+    return os.path.join(directory, 'index.html')
+
+
+def _write_atomic(filename, content):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp = f'{filename}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as fh:
+        fh.write(content)
+    os.replace(tmp, filename)
+
+
+def render_page(url, root=None):
+    """Render ``url`` through the full middleware stack and write it to disk"""
+    from django.test import Client
+
+    host = getattr(settings, 'PRERENDER_HOST', '') or settings.ALLOWED_HOSTS[0]
+    client = Client(HTTP_HOST=host)
+    response = client.get(url, secure=not settings.DEBUG)
+    if response.status_code != 200:
+        return url, response.status_code
+    _write_atomic(output_path(url, root), response.content)
+    return url, 200
+
+
+def _render_chunk(urls, root):
+    return [render_page(url, root) for url in urls]
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def render_pages(urls, root=None, jobs=None):
+    """Render ``urls``, fanning out across a process pool when ``jobs`` > 1"""
+    root = root or settings.PRERENDER_ROOT
+    urls = list(urls)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(urls) < 2:
+        return [render_page(url, root) for url in urls]
+
+    # Children must open their own database connections
+    connections.close_all()
+    size = max(1, math.ceil(len(urls) / (jobs * 4)))
+    chunks = [urls[i:i + size] for i in range(0, len(urls), size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        for chunk_results in pool.map(_render_chunk, chunks, [root] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+def has_manifest(root=None):
+    return os.path.exists(os.path.join(root or settings.PRERENDER_ROOT, MANIFEST_NAME))
+
+
+def load_manifest(root=None):
+    root = root or settings.PRERENDER_ROOT
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as fh:
+            return {url: set(tags) for url, tags in json.load(fh).items()}
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(pages, root=None):
+    root = root or settings.PRERENDER_ROOT
+    data = {url: sorted(tags) for url, tags in sorted(pages.items())}
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(data, indent=1).encode())
+
+
+def remove_pages(urls, root=None):
+    for url in urls:
+        try:
+            os.remove(output_path(url, root))
+        except FileNotFoundError:
+            pass
+
+
+def queue_tags(dirty_tags, root=None):
+    """Record ``dirty_tags`` for the next ``render_queued()``; nothing before the first full render"""
+    root = root or settings.PRERENDER_ROOT
+    if not dirty_tags or not has_manifest(root):
+        return
+    with open(os.path.join(root, QUEUE_NAME), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        fh.write(json.dumps(sorted(dirty_tags)) + '\n')
+
+
+def take_queued_tags(root=None):
+    """Empty the queue and return the tags it held"""
+    path = os.path.join(root or settings.PRERENDER_ROOT, QUEUE_NAME)
+    try:
+        fh = open(path, 'r+')
+    except FileNotFoundError:
+        return set()
+    with fh:
+        # Writers hold the same lock, so no line lands between read and truncate
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        tags = set()
+        for line in fh:
+            if line.strip():
+                tags.update(json.loads(line))
+        fh.truncate(0)
+    return tags
+
+
+def expired_tags(root=None):
+    """
+    Tags of pages that went stale without any save: ``UPCOMING_EVENTS_TAG``
+    once an event that was upcoming when the homepage was written has started
+    """
+    from django.urls import reverse
+
+    try:
+        rendered = os.path.getmtime(output_path(reverse('home'), root))
+    except OSError:
+        return set()
+    since = datetime.fromtimestamp(rendered, tz=dt_timezone.utc) - RENDER_MARGIN
+    started = Event.objects.filter(is_active=True, date__gte=since, date__lte=timezone.now())
+    return {UPCOMING_EVENTS_TAG} if started.exists() else set()
+
+
+def render_queued(root=None, jobs=None):
+    """Re-render the pages affected by every change queued since the last call"""
+    dirty_tags = take_queued_tags(root) | expired_tags(root)
+    if not dirty_tags:
+        return []
+    try:
+        return rerender_for_tags(dirty_tags, root, jobs)
+    except Exception:
+        queue_tags(dirty_tags, root)
+        raise
+
+
+def prerender_site(root=None, jobs=None):
+    """Render every public page and write a fresh manifest"""
+    # Everything queued so far is covered by this run
+    take_queued_tags(root)
+    pages = collect_pages()
+    previous = load_manifest(root) or {}
+    results = render_pages(pages, root=root, jobs=jobs)
+    remove_pages(set(previous) - set(pages), root)
+    save_manifest(pages, root)
+    return results
+
+
+def rerender_for_tags(dirty_tags, root=None, jobs=1):
+    """
+    Re-render only the pages that depend on ``dirty_tags``. New pages (a new
+    slug, an extra page of results) are rendered and vanished ones removed.
+    Does nothing if the site has never been pre-rendered.
+    """
+    previous = load_manifest(root)
+    if previous is None:
+        return []
+    pages = collect_pages()
+    stale = [
+        url for url, tags in pages.items()
+        if url not in previous or tags & dirty_tags
+    ]
+    results = render_pages(stale, root=root, jobs=jobs)
+    remove_pages(set(previous) - set(pages), root)
+    save_manifest(pages, root)
+    return results
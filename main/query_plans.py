@@ -0,0 +1,75 @@
+"""
+Query plan checks for the public views.
+
+``full_scans()`` requests each URL, runs SQLite's ``EXPLAIN QUERY PLAN`` on
+every SELECT it issued and reports the ones that fall back to scanning a whole
+table. ``manage.py check_query_plans`` runs it against the live database and
+``main.tests`` against seeded rows, so a dropped or unusable index fails the
+test suite.
+"""
+import re
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .models import Event, Story, BlogPost, Tag
+
+# Admin-curated tables with a handful of rows, where a scan is the best plan
+SMALL_TABLES = {
+    'main_teammember', 'main_supporter', 'main_impactstat', 'main_impactstory',
+    'django_content_type', 'django_session', 'auth_user',
+}
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def sample_urls():
+    """Every public view, with the filters and searches the listing pages offer"""
+    urls = [
+        '/', '/about/', '/team/', '/donate/',
+        '/events/', '/events/?q=workshop', '/events/?location=Freetown&q=workshop',
+        '/events/2025/6/',
+        '/stories/', '/stories/?q=leader', '/stories/?location=Freetown&q=leader',
+        '/blog/', '/blog/?q=health',
+        '/resources/', '/resources/?category=guide', '/resources/?category=guide&q=toolkit',
+    ]
+    for queryset in (
+        Event.objects.filter(is_active=True),
+        Story.objects.filter(is_active=True),
+        BlogPost.objects.filter(published=True, is_active=True),
+    ):
+        obj = queryset.first()
+        if obj is not None:
+            urls.append(obj.get_absolute_url())
+    tag = Tag.objects.filter(post_count__gt=0).first()
+    if tag is not None:
+        urls.append(tag.get_absolute_url())
+    return urls
+
+
+def explain(connection, sql):
+    # captured SQL has parameters already interpolated
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def check(connection, urls, client=None):
+    """Yield ``(url, sql, plan, scanned tables)`` for every SELECT the URLs run"""
+    client = client or Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    for url in urls:
+        with CaptureQueriesContext(connection) as captured:
+            client.get(url, secure=not settings.DEBUG)
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = explain(connection, sql)
+            scans = [m.group(1) for m in map(FULL_SCAN.match, plan) if m and m.group(1) not in SMALL_TABLES]
+            yield url, sql, plan, scans
+
+
+def full_scans(connection, urls, client=None):
+    """``(url, sql, plan)`` of every SELECT that scans a whole table"""
+    return [(url, sql, plan) for url, sql, plan, scans in check(connection, urls, client) if scans]
@@ -0,0 +1,281 @@
+"""
+"Related content" recommendations across events, stories and blog posts.
+
+``build_index`` turns every live object into a TF-IDF vector (title, body and
+tags), finds each one's top-k cosine neighbours with NumPy, and stores them in
+``RelatedItem``. The vectors, vocabulary and IDF weights are kept under
+``settings.RELATED_INDEX_DIR`` so a single saved object can be scored against
+the existing index without a full rebuild.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.urls import reverse
+
+from .models import Event, Story, BlogPost, RelatedItem
+
+# model -> (detail url name, text fields)
+SOURCES = {
+    Event: ('event_detail', ('title', 'description', 'location')),
+    Story: ('story_detail', ('title', 'content', 'location')),
+    BlogPost: ('blog_detail', ('title', 'excerpt', 'content', 'tags')),
+}
+
+STOP_WORDS = frozenset('''
+    about after again also among and are because been before being between both but can
+    could did does doing down during each few for from further had has have having her here
+    hers him his how into its itself just more most not now off once only other our ours out
+    over own same she should some such than that the their theirs them then there these they
+    this those through too under until very was were what when where which while who whom
+    why will with would you your yours
+'''.split())
+
+_TAGS = re.compile(r'<[^>]+>')
+_WORDS = re.compile(r'[a-z][a-z0-9]{2,}')
+
+
+def live_queryset(model):
+    queryset = model.objects.filter(is_active=True)
+    if model is BlogPost:
+        queryset = queryset.filter(published=True)
+    return queryset
+
+
+def tokenize(text):
+    return [w for w in _WORDS.findall(_TAGS.sub(' ', text).lower()) if w not in STOP_WORDS]
+
+
+def _document(model, values):
+    url_name, fields = SOURCES[model]
+    return {
+        'key': (model._meta.label_lower, values['pk']),
+        'title': values['title'],
+        'url': reverse(url_name, kwargs={'slug': values['slug']}),
+        'kind': str(model._meta.verbose_name),
+        'tokens': tokenize(' '.join(values[f] or '' for f in fields)),
+    }
+
+
+def documents():
+    for model, (_, fields) in SOURCES.items():
+        for values in live_queryset(model).values('pk', 'slug', *fields).iterator(chunk_size=500):
+            yield _document(model, values)
+
+
+def document_for(instance):
+    _, fields = SOURCES[type(instance)]
+    values = {f: getattr(instance, f) for f in fields}
+    values.update(pk=instance.pk, slug=instance.slug)
+    return _document(type(instance), values)
+
+
+def _vectorize(token_lists, vocab, idf):
+    """L2-normalized float32 TF-IDF rows with sublinear term frequency"""
+    matrix = np.zeros((len(token_lists), len(vocab)), dtype=np.float32)
+    for row, tokens in enumerate(token_lists):
+        counts = Counter(t for t in tokens if t in vocab)
+        if counts:
+            cols = np.fromiter((vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+            tf = np.fromiter((1 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+            matrix[row, cols] = tf * idf[cols]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _vocabulary(token_lists, max_features, max_df=0.8):
+    n = len(token_lists)
+    df = Counter(t for tokens in token_lists for t in set(tokens))
+    min_df = 2 if n >= 50 else 1
+    terms = [t for t, d in df.items() if min_df <= d <= max(1, max_df * n)]
+    terms.sort(key=lambda t: (-df[t], t))
+    terms = terms[:max_features]
+    vocab = {t: i for i, t in enumerate(terms)}
+    idf = np.array([math.log((1 + n) / (1 + df[t])) + 1 for t in terms], dtype=np.float32)
+    return vocab, idf
+
+
+def top_k(matrix, k, chunk=256):
+    """(indices, scores) of each row's k most similar other rows"""
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    indices = np.zeros((n, max(k, 0)), dtype=np.int64)
+    scores = np.zeros((n, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+    for start in range(0, n, chunk):
+        sims = matrix[start:start + chunk] @ matrix.T
+        rows = np.arange(sims.shape[0])
+        sims[rows, rows + start] = -1.0
+        best = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(sims, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        indices[start:start + chunk] = np.take_along_axis(best, order, axis=1)
+        scores[start:start + chunk] = np.take_along_axis(best_scores, order, axis=1)
+    return indices, scores
+
+
+def _content_types():
+    return {m._meta.label_lower: ContentType.objects.get_for_model(m) for m in SOURCES}
+
+
+def _item(types, source_key, target, rank, score):
+    return RelatedItem(
+        source_type=types[source_key[0]], source_id=source_key[1],
+        target_type=types[target['key'][0]], target_id=target['key'][1],
+        rank=rank, score=float(score),
+        title=target['title'][:200], url=target['url'][:255], kind=target['kind'],
+    )
+
+
+def build_index(k=None, max_features=None):
+    """Rebuild every object's related list and the on-disk index; returns object count"""
+    k = k or settings.RELATED_ITEMS_COUNT
+    max_features = max_features or settings.RELATED_MAX_FEATURES
+    docs = list(documents())
+    vocab, idf = _vocabulary([d['tokens'] for d in docs], max_features)
+    matrix = _vectorize([d['tokens'] for d in docs], vocab, idf)
+    indices, scores = top_k(matrix, k)
+
+    types = _content_types()
+    items = [
+        _item(types, doc['key'], docs[j], rank, score)
+        for doc, row, row_scores in zip(docs, indices, scores)
+        for rank, (j, score) in enumerate(zip(row, row_scores))
+        if score > 0
+    ]
+    with transaction.atomic():
+        RelatedItem.objects.all().delete()
+        RelatedItem.objects.bulk_create(items, batch_size=1000)
+
+    _save_index(matrix, vocab, idf, docs)
+    return len(docs)
+
+
+def _save_index(matrix, vocab, idf, docs):
+    directory = settings.RELATED_INDEX_DIR
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'vectors.tmp.npy'), matrix)
+    np.save(os.path.join(directory, 'idf.tmp.npy'), idf)
+    meta = {
+        'vocab': sorted(vocab, key=vocab.get),
+        'docs': [{k: d[k] for k in ('key', 'title', 'url', 'kind')} for d in docs],
+    }
+    with open(os.path.join(directory, 'meta.tmp.json'), 'w') as fh:
+        json.dump(meta, fh)
+    for name in ('vectors.npy', 'idf.npy', 'meta.json'):
+        stem, ext = name.split('.')
+        os.replace(os.path.join(directory, f'{stem}.tmp.{ext}'), os.path.join(directory, name))
+
+
+_loaded = {}
+
+
+def load_index():
+    """(matrix, vocab, idf, docs) from the last build, or None; cached per process"""
+    directory = settings.RELATED_INDEX_DIR
+    meta_path = os.path.join(directory, 'meta.json')
+    try:
+        mtime = os.path.getmtime(meta_path)
+    except OSError:
+        return None
+    if _loaded.get('mtime') != mtime:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        for doc in meta['docs']:
+            doc['key'] = tuple(doc['key'])
+        _loaded.update(
+            mtime=mtime,
+            matrix=np.load(os.path.join(directory, 'vectors.npy'), mmap_mode='r'),
+            idf=np.load(os.path.join(directory, 'idf.npy')),
+            vocab={t: i for i, t in enumerate(meta['vocab'])},
+            docs=meta['docs'],
+        )
+    return _loaded['matrix'], _loaded['vocab'], _loaded['idf'], _loaded['docs']
+
+
+def remove_object(content_type_id, pk):
+    """Drop an object's related list and every link to it"""
+    RelatedItem.objects.filter(source_type_id=content_type_id, source_id=pk).delete()
+    RelatedItem.objects.filter(target_type_id=content_type_id, target_id=pk).delete()
+
+
+def _live_keys(keys):
+    """The ``(label, pk)`` index keys whose objects still exist and are live"""
+    wanted = {}
+    for label, pk in keys:
+        wanted.setdefault(label, []).append(pk)
+    live = set()
+    for model in SOURCES:
+        label = model._meta.label_lower
+        if label in wanted:
+            pks = live_queryset(model).filter(pk__in=wanted[label]).values_list('pk', flat=True)
+            live.update((label, pk) for pk in pks)
+    return live
+
+
+def update_object(instance, k=None):
+    """
+    Score one saved object against the last built index: rewrite its own
+    related list and slot it into its neighbours' lists where it ranks.
+    """
+    if not live_queryset(type(instance)).filter(pk=instance.pk).exists():
+        remove_object(ContentType.objects.get_for_model(instance).pk, instance.pk)
+        return
+    index = load_index()
+    if index is None:
+        return
+    matrix, vocab, idf, docs = index
+    k = k or settings.RELATED_ITEMS_COUNT
+    doc = document_for(instance)
+    types = _content_types()
+    source_ct = types[doc['key'][0]]
+
+    # Keep links pointing at this object current if its title or slug changed
+    RelatedItem.objects.filter(target_type=source_ct, target_id=instance.pk).update(
+        title=doc['title'][:200], url=doc['url'][:255],
+    )
+
+    scores = np.asarray(matrix @ _vectorize([doc['tokens']], vocab, idf)[0])
+    for i, other in enumerate(docs):
+        if other['key'] == doc['key']:
+            scores[i] = -1.0
+    # The index may still hold objects deleted or hidden since it was built
+    candidates = [i for i in np.argsort(-scores)[:k * 4] if scores[i] > 0]
+    live = _live_keys(docs[i]['key'] for i in candidates)
+    best = [i for i in candidates if docs[i]['key'] in live][:k]
+
+    with transaction.atomic():
+        RelatedItem.objects.filter(source_type=source_ct, source_id=instance.pk).delete()
+        RelatedItem.objects.bulk_create(
+            [_item(types, doc['key'], docs[i], rank, scores[i]) for rank, i in enumerate(best)]
+        )
+        for i in best:
+            _offer_neighbour(types, docs[i], doc, float(scores[i]), k)
+
+
+def _offer_neighbour(types, neighbour, doc, score, k):
+    """Add ``doc`` to ``neighbour``'s related list if it beats the weakest entry"""
+    ct = types[neighbour['key'][0]]
+    current = list(RelatedItem.objects.filter(source_type=ct, source_id=neighbour['key'][1]))
+    target_ct = types[doc['key'][0]]
+    current = [r for r in current if not (r.target_type_id == target_ct.pk and r.target_id == doc['key'][1])]
+    if len(current) >= k and min(r.score for r in current) >= score:
+        return
+    entries = [(r.score, r) for r in current]
+    entries.append((score, _item(types, neighbour['key'], doc, 0, score)))
+    entries.sort(key=lambda e: -e[0])
+    RelatedItem.objects.filter(source_type=ct, source_id=neighbour['key'][1]).delete()
+    rows = []
+    for rank, (_, item) in enumerate(entries[:k]):
+        item.pk = None
+        item.rank = rank
+        rows.append(item)
+    RelatedItem.objects.bulk_create(rows)
@@ -0,0 +1,31 @@
+"""
+Pre-rendered long-form text.
+
+Models built on ``RenderedText`` render their body field once on save into
+``body_html`` (what ``|linebreaks`` would produce), ``summary`` (a plain-text
+excerpt) and ``word_count``. Detail pages print the stored HTML and list pages
+defer both the body and its HTML, so neither is loaded or re-processed per
+request.
+"""
+import math
+
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+SUMMARY_WORDS = 30
+WORDS_PER_MINUTE = 200
+
+
+def render_fields(text):
+    """Values for the rendered columns of ``text``"""
+    text = text or ''
+    plain = strip_tags(text)
+    return {
+        'body_html': linebreaks(text, autoescape=True),
+        'summary': Truncator(plain).words(SUMMARY_WORDS),
+        'word_count': len(plain.split()),
+    }
+
+
+def reading_minutes(word_count):
+    return max(1, math.ceil(word_count / WORDS_PER_MINUTE))
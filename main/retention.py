@@ -0,0 +1,165 @@
+"""
+Data retention for append-only tables.
+
+Rows older than a model's retention period are moved out of the database into
+gzip-compressed JSONL files, one per model and month of ``created_at``::
+
+    ARCHIVE_ROOT/main.comment/2024/2024-03.jsonl.gz
+
+Rows are moved in chunks, oldest first. Each chunk is appended to its files
+and flushed to disk before the rows are deleted in the same transaction, so
+an interrupted run can at worst archive a chunk twice, never lose it;
+``read_archive`` drops such duplicates by primary key.
+"""
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Comment, Contact, Donation
+
+
+@dataclass
+class Policy:
+    model: type
+    # Default retention; RETENTION_DAYS in settings overrides it per policy
+    days: int
+    # Only rows matching this are ever archived
+    condition: Q = field(default_factory=Q)
+
+
+POLICIES = {
+    'comment': Policy(Comment, days=365),
+    # Unread messages stay until someone has dealt with them
+    'contact': Policy(Contact, days=730, condition=Q(is_read=True)),
+    # Financial records: keep seven years, and never archive unprocessed ones
+    'donation': Policy(Donation, days=7 * 365, condition=Q(processed=True)),
+}
+
+
+def retention_days(name):
+    return getattr(settings, 'RETENTION_DAYS', {}).get(name, POLICIES[name].days)
+
+
+def cutoff(name, now=None):
+    return (now or timezone.now()) - timedelta(days=retention_days(name))
+
+
+def expired_rows(name, now=None):
+    policy = POLICIES[name]
+    return policy.model.objects.filter(policy.condition, created_at__lt=cutoff(name, now))
+
+
+def model_dir(model, root=None):
+    return os.path.join(root or settings.ARCHIVE_ROOT, model._meta.label_lower)
+
+
+def partition_path(model, created_at, root=None):
+    if timezone.is_aware(created_at):
+        created_at = created_at.astimezone(dt_timezone.utc)
+    return os.path.join(model_dir(model, root), f'{created_at:%Y}', f'{created_at:%Y-%m}.jsonl.gz')
+
+
+def _serialize(rows):
+    return serializers.serialize('python', rows, use_natural_foreign_keys=True)
+
+
+def _append(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Each append adds a gzip member; readers see one continuous stream
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as fh:
+            for record in records:
+                fh.write(json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_chunk(name, chunk_size, now=None, root=None, dirty_tags=None):
+    """
+    Move up to ``chunk_size`` of the oldest expired rows; returns how many
+    moved. The pre-render tags of the moved rows are added to ``dirty_tags``.
+    """
+    from . import prerender
+
+    model = POLICIES[name].model
+    with transaction.atomic():
+        rows = list(expired_rows(name, now).order_by('created_at', 'pk')[:chunk_size])
+        if not rows:
+            return 0
+        if dirty_tags is not None and model in prerender.TRACKED_MODELS:
+            recent_ids = prerender.recent_comment_ids() if model is Comment else None
+            for row in rows:
+                dirty_tags.update(prerender.tags_for_instance(row, recent_ids))
+        partitions = {}
+        for row, record in zip(rows, _serialize(rows)):
+            partitions.setdefault(partition_path(model, row.created_at, root), []).append(record)
+        for path, records in partitions.items():
+            _append(path, records)
+        # Bypass per-row signals; callers invalidate once per run (see archive())
+        model.objects.filter(pk__in=[row.pk for row in rows])._raw_delete(model.objects.db)
+    return len(rows)
+
+
+def archive(name, chunk_size=1000, now=None, root=None):
+    """Move every expired row of one policy into the archive"""
+    from . import prerender, versions
+
+    model = POLICIES[name].model
+    total = 0
+    dirty_tags = set()
+    while True:
+        moved = archive_chunk(name, chunk_size, now, root, dirty_tags)
+        total += moved
+        if moved < chunk_size:
+            break
+    if total:
+        versions.bump_version(model)
+        prerender.queue_tags(dirty_tags)
+    return total
+
+
+def partitions(model, since=None, until=None, root=None):
+    """Archive files of ``model``, oldest first, limited to ``YYYY-MM`` bounds"""
+    directory = model_dir(model, root)
+    if not os.path.isdir(directory):
+        return []
+    paths = []
+    for year in sorted(os.listdir(directory)):
+        for filename in sorted(os.listdir(os.path.join(directory, year))):
+            month = filename.split('.')[0]
+            if (since and month < since) or (until and month > until):
+                continue
+            paths.append(os.path.join(directory, year, filename))
+    return paths
+
+
+def read(model, since=None, until=None, root=None):
+    """Yield archived records of ``model`` once per primary key, oldest first"""
+    seen = set()
+    for path in partitions(model, since, until, root):
+        with gzip.open(path, 'rt') as fh:
+            for line in fh:
+                record = json.loads(line)
+                if record['pk'] not in seen:
+                    seen.add(record['pk'])
+                    yield record
+
+
+def restore(records):
+    """Insert archived records whose primary key is free again; returns how many"""
+    restored = 0
+    for obj in serializers.deserialize('python', records):
+        model = type(obj.object)
+        if not model.objects.filter(pk=obj.object.pk).exists():
+            obj.save()
+            restored += 1
+    return restored
@@ -0,0 +1,130 @@
+import os
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import archive, facets, newsletter, prerender, tags, versions
+from .db import configure_sqlite
+from .models import Event, Story, BlogPost, Resource, Newsletter
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """WAL, busy timeout and friends for every new SQLite connection"""
+    configure_sqlite(connection)
+
+
+def _queue_rerender(instance):
+    if not prerender.has_manifest():
+        return
+    tags = prerender.tags_for_instance(instance)
+    transaction.on_commit(lambda: prerender.queue_tags(tags))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_content_version(sender, instance, **kwargs):
+    """Invalidate everything cached against this model's version"""
+    if sender._meta.app_label == 'main':
+        versions.bump_version(sender)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def refresh_prerendered_pages(sender, instance, update_fields=None, **kwargs):
+    """Queue the static pages affected by a content change for re-rendering"""
+    if sender in prerender.TRACKED_MODELS and not kwargs.get('raw') and not prerender.only_counters(update_fields):
+        _queue_rerender(instance)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remember_post_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(instance.tag_index.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=BlogPost)
+def recount_deleted_post_tags(sender, instance, **kwargs):
+    tags.refresh_counts(getattr(instance, '_deleted_tag_ids', []))
+
+
+def _has_related_index():
+    return os.path.exists(os.path.join(settings.RELATED_INDEX_DIR, 'meta.json'))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=BlogPost)
+def refresh_related_items(sender, instance, **kwargs):
+    """Score a saved object against the related-content index built by build_related"""
+    if kwargs.get('raw') or not _has_related_index():
+        return
+    # NumPy is only needed once an index exists
+    from . import related
+    transaction.on_commit(lambda: related.update_object(instance))
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=BlogPost)
+def remove_related_items(sender, instance, **kwargs):
+    """Drop a deleted object's related list and the links to it"""
+    if not _has_related_index():
+        return
+    from . import related
+    # The delete clears instance.pk before on_commit callbacks run
+    content_type_id, pk = ContentType.objects.get_for_model(sender).pk, instance.pk
+    transaction.on_commit(lambda: related.remove_object(content_type_id, pk))
+
+
+def _facet_fields_touched(sender, update_fields):
+    fields = {field for _, field in facets.facets_for(sender)} | {'is_active'}
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=Story)
+@receiver(pre_save, sender=Resource)
+def remember_facet_values(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or instance.pk is None or not _facet_fields_touched(sender, update_fields):
+        return
+    fields = [field for _, field in facets.facets_for(sender)]
+    instance._old_facet_values = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Resource)
+def recount_facets(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Recount the facet values a save or delete moved a row into or out of"""
+    if raw or not _facet_fields_touched(sender, update_fields):
+        return
+    old = getattr(instance, '_old_facet_values', {})
+    for name, field in facets.facets_for(sender):
+        facets.recount(name, [old.get(field), getattr(instance, field)])
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_month(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None:
+        old_date = sender.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+        instance._old_month = archive.month_of(old_date) if old_date else None
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def recount_event_months(sender, instance, raw=False, **kwargs):
+    """Recount the archive months an event left or joined"""
+    if not raw and instance.date:
+        archive.recount([getattr(instance, '_old_month', None), archive.month_of(instance.date)])
+
+
+@receiver(post_delete, sender=Newsletter)
+def forget_subscriber(sender, instance, **kwargs):
+    newsletter.forget(instance.email)
@@ -0,0 +1,58 @@
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import Event, Story, BlogPost, Tag
+
+
+class StaticViewSitemap(Sitemap):
+    priority = 0.8
+    changefreq = 'weekly'
+
+    def items(self):
+        return ['home', 'about', 'our_team', 'contact', 'donate', 'events', 'stories', 'blog', 'resources']
+
+    def location(self, item):
+        return reverse(item)
+
+
+class ContentSitemap(Sitemap):
+    """Detail pages of a content model, with lastmod from updated_at"""
+    changefreq = 'monthly'
+    priority = 0.6
+    limit = 5000
+
+    def lastmod(self, obj):
+        return obj.updated_at
+
+
+class EventSitemap(ContentSitemap):
+    def items(self):
+        return Event.objects.filter(is_active=True).only('slug', 'updated_at').order_by('pk')
+
+
+class StorySitemap(ContentSitemap):
+    def items(self):
+        return Story.objects.filter(is_active=True).only('slug', 'updated_at').order_by('pk')
+
+
+class BlogSitemap(ContentSitemap):
+    def items(self):
+        return BlogPost.objects.filter(published=True, is_active=True).only('slug', 'updated_at').order_by('pk')
+
+
+class TagSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.4
+    limit = 5000
+
+    def items(self):
+        return Tag.objects.filter(post_count__gt=0).only('slug').order_by('pk')
+
+
+sitemaps = {
+    'pages': StaticViewSitemap,
+    'events': EventSitemap,
+    'stories': StorySitemap,
+    'blog': BlogSitemap,
+    'tags': TagSitemap,
+}
@@ -0,0 +1,82 @@
+"""
+Slug resolution cache for detail pages.
+
+``resolve()`` maps a slug to a primary key and the primary key to the object
+row, caching both against the versions in ``main.versions``. Any save or
+delete of the model (a new row, a slug change, an ``is_active`` or
+``published`` toggle, a bulk import) moves every entry to a fresh key in all
+workers at once, so nothing has to be deleted explicitly.
+
+A slug with no live row is remembered as a miss for
+``SLUG_CACHE_MISS_TIMEOUT`` seconds, and a slug longer than the field allows
+is rejected outright, so probes for made-up URLs cost no query either. Misses
+are kept in a bounded per-process set rather than the shared cache: every
+made-up URL would otherwise cost a file write (and a cull of the cache
+directory) and push real entries out.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .versions import combined_version
+
+# Slug keys that matched nothing in this process, oldest first: {key: expiry}
+MISS_LIMIT = 10000
+
+_misses = OrderedDict()
+_misses_lock = Lock()
+
+
+def _is_miss(key):
+    with _misses_lock:
+        expires = _misses.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del _misses[key]
+            return False
+        return True
+
+
+def _remember_miss(key):
+    with _misses_lock:
+        _misses[key] = time.monotonic() + getattr(settings, 'SLUG_CACHE_MISS_TIMEOUT', 30)
+        _misses.move_to_end(key)
+        while len(_misses) > MISS_LIMIT:
+            _misses.popitem(last=False)
+
+
+def _prefix(model, models):
+    return f'{model._meta.label_lower}:{combined_version([model, *models])}'
+
+
+def resolve(queryset, slug, slug_field='slug', models=()):
+    """
+    ``queryset.get(slug=slug)`` through the cache. ``models`` lists anything
+    else the cached row depends on (e.g. prefetched tags).
+    """
+    model = queryset.model
+    field = model._meta.get_field(slug_field)
+    if field.max_length and len(slug) > field.max_length:
+        raise model.DoesNotExist
+    prefix = _prefix(model, models)
+    slug_key = f'slug:{prefix}:{slug}'
+
+    if _is_miss(slug_key):
+        raise model.DoesNotExist
+    pk = cache.get(slug_key)
+    if pk is not None:
+        obj = cache.get(f'row:{prefix}:{pk}')
+        if obj is not None:
+            return obj
+
+    try:
+        obj = queryset.get(**{slug_field: slug})
+    except model.DoesNotExist:
+        _remember_miss(slug_key)
+        raise
+    cache.set_many({slug_key: obj.pk, f'row:{prefix}:{obj.pk}': obj}, getattr(settings, 'SLUG_CACHE_TIMEOUT', 3600))
+    return obj
@@ -0,0 +1,80 @@
+"""
+Unique slugs for titled content.
+
+A title's slug is ``slugify(title)`` cut to fit the field; if that is taken,
+``-2``, ``-3``, ... is appended (the base shortened to keep the suffix within
+``max_length``). ``unique_slug`` serves single saves with one prefix lookup
+(another for each extra digit the counter needs);
+``SlugAllocator`` serves bulk imports with one lookup for the whole run.
+"""
+from django.utils.text import slugify
+
+
+def _max_length(model):
+    return model._meta.get_field('slug').max_length
+
+
+def _base(text, max_length):
+    return slugify(text)[:max_length].strip('-') or 'item'
+
+
+def _candidates(base, max_length, digits):
+    """Suffixed slugs whose counter has ``digits`` digits, in order"""
+    for n in range(max(2, 10 ** (digits - 1)), 10 ** digits):
+        suffix = f'-{n}'
+        yield base[:max_length - len(suffix)].rstrip('-') + suffix
+
+
+def _first_free(base, taken, max_length):
+    if base not in taken:
+        return base
+    digits = 1
+    while True:
+        for slug in _candidates(base, max_length, digits):
+            if slug not in taken:
+                return slug
+        digits += 1
+
+
+def unique_slug(instance, text):
+    """A slug for ``instance`` from ``text`` that no other row of its model uses"""
+    model = type(instance)
+    max_length = _max_length(model)
+    base = _base(text, max_length)
+    others = model._base_manager.exclude(pk=instance.pk)
+    digits = 1
+    while True:
+        # Every candidate with this many counter digits (and the base itself)
+        # starts with the base cut to leave room for the suffix
+        prefix = base[:max_length - digits - 1].rstrip('-')
+        taken = set(others.filter(slug__startswith=prefix).values_list('slug', flat=True))
+        if digits == 1 and base not in taken:
+            return base
+        for slug in _candidates(base, max_length, digits):
+            if slug not in taken:
+                return slug
+        digits += 1
+
+
+class SlugAllocator:
+    """Hand out unique slugs for many new rows after loading the existing ones once"""
+
+    def __init__(self, model):
+        self.model = model
+        self.max_length = _max_length(model)
+        self.taken = set(model._base_manager.values_list('slug', flat=True))
+
+    def claim(self, slug):
+        """Reserve an explicit slug; False if it is already in use"""
+        if slug in self.taken:
+            return False
+        self.taken.add(slug)
+        return True
+
+    def allocate(self, text):
+        slug = _first_free(_base(text, self.max_length), self.taken, self.max_length)
+        self.taken.add(slug)
+        return slug
+
+    def release(self, slugs):
+        self.taken.difference_update(slugs)
@@ -0,0 +1,95 @@
+"""
+Normalized blog tags.
+
+``BlogPost.tags`` stays the editable comma-separated field; on every save it is
+mirrored into ``Tag`` rows linked through ``BlogPost.tag_index``. Each Tag
+carries the number of live posts using it, and only the tags a save touches
+are recounted, so the tag cloud never needs a GROUP BY over all posts.
+
+A tag is stored under its name cut to ``Tag.name``'s length and the slug of
+that, cut to ``Tag.slug``'s; names that only differ beyond the cut share a tag.
+"""
+from django.utils.text import slugify
+
+from .models import Tag, BlogPost
+from .versions import bump_version, cached
+
+TAG_CLOUD_KEY = 'blog:tag_cloud'
+
+
+def _tag_name(name):
+    return name[:Tag._meta.get_field('name').max_length].strip()
+
+
+def tag_slug(name):
+    """Slug of the Tag that ``name`` is stored as"""
+    return slugify(_tag_name(name))[:Tag._meta.get_field('slug').max_length].strip('-')
+
+
+def parse_tags(raw):
+    """Split a comma-separated tag string, dropping blanks and duplicates"""
+    seen = {}
+    for name in (raw or '').split(','):
+        name = name.strip()
+        slug = tag_slug(name)
+        if slug and slug not in seen:
+            seen[slug] = name
+    return list(seen.values())
+
+
+def _tags_for(names):
+    by_slug = {tag_slug(name): name for name in names}
+    existing = {tag.slug: tag for tag in Tag.objects.filter(slug__in=by_slug)}
+    missing = [Tag(name=_tag_name(name), slug=slug) for slug, name in by_slug.items() if slug not in existing]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update((tag.slug, tag) for tag in Tag.objects.filter(slug__in=[t.slug for t in missing]))
+    return list(existing.values())
+
+
+def live_posts():
+    return BlogPost.objects.filter(published=True, is_active=True)
+
+
+def refresh_counts(tag_ids):
+    """Recount live posts for the given tags only"""
+    if not tag_ids:
+        return
+    through = BlogPost.tag_index.through
+    live = live_posts().values('pk')
+    for tag_id in tag_ids:
+        count = through.objects.filter(tag_id=tag_id, blogpost_id__in=live).count()
+        Tag.objects.filter(pk=tag_id).update(post_count=count)
+    # update() sends no signals
+    bump_version(Tag)
+
+
+def sync_post_tags(post):
+    """Mirror ``post.tags`` into ``post.tag_index`` and refresh affected counts"""
+    old_ids = set(post.tag_index.values_list('pk', flat=True))
+    new_ids = {tag.pk for tag in _tags_for(parse_tags(post.tags))}
+    if new_ids != old_ids:
+        post.tag_index.remove(*(old_ids - new_ids))
+        post.tag_index.add(*(new_ids - old_ids))
+    # Publishing/unpublishing changes counts even when the tags stay the same
+    refresh_counts(old_ids | new_ids)
+
+
+def link_post_tags(posts):
+    """Link freshly inserted posts to their tags in bulk; returns the tag ids to recount"""
+    names = {post.pk: parse_tags(post.tags) for post in posts}
+    by_slug = {tag.slug: tag for tag in _tags_for([name for post_names in names.values() for name in post_names])}
+    through = BlogPost.tag_index.through
+    links = [
+        through(blogpost_id=pk, tag_id=by_slug[tag_slug(name)].pk)
+        for pk, post_names in names.items() for name in post_names
+    ]
+    through.objects.bulk_create(links, ignore_conflicts=True, batch_size=500)
+    return {link.tag_id for link in links}
+
+
+def tag_cloud():
+    """Name, slug and post_count of every tag on a live post, most used first"""
+    return cached(TAG_CLOUD_KEY, [Tag], lambda: list(
+        Tag.objects.filter(post_count__gt=0).values('name', 'slug', 'post_count')
+    ))
@@ -0,0 +1,199 @@
+"""
+Template render profiling.
+
+``ProfilingDjangoTemplates`` is the project's template backend. With
+``TEMPLATE_PROFILING`` on it wraps the render methods of templates and of the
+``{% include %}`` and ``{% block %}`` nodes, so that while a ``Profile`` is
+collecting, every render is timed and its output hashed:
+
+* ``template``  every template rendered, including included and parent templates
+* ``include``   each ``{% include %}``, by included name and the template containing it
+* ``block``     each ``{% block %}``, by name and the page template being rendered
+
+``total`` is inclusive; ``own`` excludes nested profiled renders. An include
+or block that produced the same output in every request that rendered it is
+a candidate for ``{% cache %}``.
+
+``main.middleware.TemplateProfilingMiddleware`` appends a table of each
+request's renders to HTML pages, and ``manage.py profile_templates`` requests
+the public pages and prints the totals. With profiling off nothing is wrapped.
+"""
+import functools
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.template.base import Template
+from django.template.loader_tags import BlockNode, IncludeNode
+from django.utils.html import format_html, format_html_join
+
+# Distinct outputs remembered per fragment; two are enough to rule it out
+MAX_DIGESTS = 2
+
+KINDS = ('template', 'include', 'block')
+
+
+@dataclass
+class Stat:
+    calls: int = 0
+    # Seconds, including and excluding nested profiled renders
+    total: float = 0.0
+    own: float = 0.0
+    # Requests that rendered it at least once
+    requests: int = 0
+    digests: set = field(default_factory=set)
+
+    @property
+    def identical(self):
+        return self.requests > 1 and len(self.digests) == 1
+
+    def add_digests(self, digests):
+        for digest in digests:
+            if len(self.digests) >= MAX_DIGESTS:
+                break
+            self.digests.add(digest)
+
+
+class Profile:
+    """Render statistics keyed by ``(kind, name)``"""
+
+    def __init__(self):
+        self.stats = {}
+        # Time spent in nested renders, one entry per render in progress
+        self._nested = []
+
+    def time(self, key, render, *args):
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            output = render(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+        stat = self.stats.get(key) or self.stats.setdefault(key, Stat())
+        stat.calls += 1
+        stat.total += elapsed
+        stat.own += elapsed - nested
+        if len(stat.digests) < MAX_DIGESTS:
+            stat.digests.add(hashlib.blake2b(str(output).encode(), digest_size=16).digest())
+        return output
+
+    def merge(self, other):
+        for key, theirs in other.stats.items():
+            stat = self.stats.setdefault(key, Stat())
+            stat.calls += theirs.calls
+            stat.total += theirs.total
+            stat.own += theirs.own
+            stat.requests += theirs.requests
+            stat.add_digests(theirs.digests)
+
+    def rows(self, kinds=KINDS, order='total'):
+        """``[(kind, name, stat)]``, most expensive first"""
+        rows = [(kind, name, stat) for (kind, name), stat in self.stats.items() if kind in kinds]
+        return sorted(rows, key=lambda row: getattr(row[2], order), reverse=True)
+
+    def candidates(self):
+        """Includes and blocks that rendered identically in every request"""
+        return [row for row in self.rows(('include', 'block')) if row[2].identical]
+
+
+_active = ContextVar('template_profile', default=None)
+
+
+@contextmanager
+def collect():
+    """
+    Profile the renders of one request. Nested inside another ``collect()``
+    the results are also merged into the outer profile.
+    """
+    profile = Profile()
+    parent = _active.get()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        if parent is None:
+            for stat in profile.stats.values():
+                stat.requests = 1
+        else:
+            parent.merge(profile)
+
+
+def _template_name(template):
+    if template is None:
+        return '<unknown>'
+    return template.origin.template_name or template.name or '<string>'
+
+
+def _include_name(node, context):
+    # The tag's argument as written, e.g. partials/navbar.html or a variable name
+    name = node.template.token.strip('"\'')
+    return f'{name} (in {node.origin.template_name or "<string>"})'
+
+
+def _block_name(node, context):
+    # Keyed on the page template; the parent's block node renders the child's content
+    return f'{node.name} ({_template_name(context.template)})'
+
+
+HOOKS = [
+    (Template, '_render', 'template', lambda template, context: _template_name(template)),
+    (IncludeNode, 'render', 'include', _include_name),
+    (BlockNode, 'render', 'block', _block_name),
+]
+
+
+def _profiled(render, kind, name):
+    @functools.wraps(render)
+    def wrapper(self, context, *args):
+        profile = _active.get()
+        if profile is None:
+            return render(self, context, *args)
+        return profile.time((kind, name(self, context)), render, self, context, *args)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def install():
+    """Wrap the render methods (once per process)"""
+    for cls, attr, kind, name in HOOKS:
+        method = getattr(cls, attr)
+        if not getattr(method, 'profiled', False):
+            setattr(cls, attr, _profiled(method, kind, name))
+
+
+def is_enabled():
+    return getattr(settings, 'TEMPLATE_PROFILING', False)
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """``DjangoTemplates`` that installs the render hooks when ``TEMPLATE_PROFILING`` is on"""
+
+    def __init__(self, params):
+        super().__init__(params)
+        if is_enabled():
+            install()
+
+
+def overlay(profile, limit=25):
+    """A fixed panel listing the renders of one request"""
+    rows = profile.rows()[:limit]
+    body = format_html_join(
+        '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+        ((kind, name, stat.calls, f'{stat.total * 1000:.1f}', f'{stat.own * 1000:.1f}') for kind, name, stat in rows),
+    )
+    return format_html(
+        '<div id="template-profile" style="position:fixed;bottom:0;right:0;z-index:99999;max-height:50vh;'
+        'overflow:auto;background:#fff;color:#222;font:12px monospace;border:1px solid #999;padding:4px">'
+        '<table><thead><tr><th>kind</th><th>name</th><th>calls</th><th>total ms</th><th>own ms</th></tr>'
+        '</thead><tbody>{}</tbody></table></div>',
+        body,
+    )
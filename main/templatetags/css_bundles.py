@@ -0,0 +1,53 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from main.css import minify_css, bundle_name
+
+register = template.Library()
+
+# Bundle name -> whether it was built and collected
+_available = {}
+
+
+def _bundle_exists(name):
+    if name not in _available:
+        _available[name] = staticfiles_storage.exists(name)
+    return _available[name]
+
+
+class CssBundleNode(template.Node):
+    child_nodelists = ('nodelist',)
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+        self._last = (None, None)
+
+    def bundle_for(self, css):
+        """Static name of the bundle for ``css`` (memoized for unchanged input)"""
+        if self._last[0] != css:
+            self._last = (css, bundle_name(minify_css(css)))
+        return self._last[1]
+
+    def render(self, context):
+        css = self.nodelist.render(context)
+        if getattr(settings, 'CSS_BUNDLES', False):
+            name = self.bundle_for(css)
+            if _bundle_exists(name):
+                return mark_safe(f'<link rel="stylesheet" href="{static(name)}">')
+        return mark_safe(f'<style>{css}</style>')
+
+
+@register.tag(name='cssbundle')
+def cssbundle(parser, token):
+    """
+    Serve the enclosed CSS from a static bundle built by ``build_css_bundles``,
+    falling back to an inline ``<style>`` block when the bundle is missing.
+
+        {% cssbundle %} .card { color: red; } {% endcssbundle %}
+    """
+    nodelist = parser.parse(('endcssbundle',))
+    parser.delete_first_token()
+    return CssBundleNode(nodelist)
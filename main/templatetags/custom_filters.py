@@ -1,6 +1,7 @@
 from django import template
 from django.utils.html import strip_tags
 from django.template.defaultfilters import truncatewords
+from django.utils.http import urlencode
 
 register = template.Library()
 
@@ -22,3 +23,11 @@ def trim(value):
 def truncatewords_html(value, arg):
     """Truncate HTML content while preserving tags"""
     return truncatewords(strip_tags(value), arg)
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """Query string for another page, keeping the current search and filters"""
+    params = context['request'].GET.copy()
+    params['page'] = number
+    return '?' + urlencode(sorted(params.lists()), doseq=True)
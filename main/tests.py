@@ -0,0 +1,333 @@
+import copy
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from main import importer, newsletter, prerender, query_plans, retention, slug_cache, template_profiling
+from main.models import BlogPost, Comment, Contact, Event, EventMonth, FacetCount, Newsletter, Resource, Story, Tag
+from main.slugs import SlugAllocator, unique_slug
+from main.warmup import warmup
+
+
+class ProfilingBackendTests(TestCase):
+    """Code that looks up the ``django`` engine keeps working under the profiling backend"""
+
+    def setUp(self):
+        # A fresh TEMPLATES value makes Django rebuild its engines with profiling on
+        overrides = override_settings(TEMPLATE_PROFILING=True, TEMPLATES=copy.deepcopy(settings.TEMPLATES))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_engine_is_profiling_backend(self):
+        self.assertIsInstance(engines['django'], template_profiling.ProfilingDjangoTemplates)
+
+    def test_build_css_bundles(self):
+        with tempfile.TemporaryDirectory() as output:
+            call_command('build_css_bundles', output=output, stdout=io.StringIO())
+
+    def test_warmup(self):
+        self.assertIn('templates', warmup())
+
+
+class UniqueSlugTests(TestCase):
+    """Counters of four digits still fit the field and see the slugs already taken"""
+
+    title = 'a very long event title that fills the whole slug field'
+
+    def setUp(self):
+        base = unique_slug(Event(), self.title)
+        slugs = [base] + [base[:50 - len(f'-{n}')].rstrip('-') + f'-{n}' for n in range(2, 1001)]
+        Event.objects.bulk_create(
+            Event(title=self.title, slug=slug, description='', date=timezone.now(), location='')
+            for slug in slugs
+        )
+
+    def test_next_counter(self):
+        slug = unique_slug(Event(), self.title)
+        self.assertEqual(slug, 'a-very-long-event-title-that-fills-the-whole-1001')
+        self.assertFalse(Event.objects.filter(slug=slug).exists())
+        self.assertEqual(SlugAllocator(Event).allocate(self.title), slug)
+
+
+class EventMonthArchiveTests(TestCase):
+
+    def test_out_of_range_month_is_404(self):
+        for path in ('/events/0/1/', '/events/9999/12/', '/events/2024/13/'):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+    def test_location_filter(self):
+        date = timezone.now().replace(year=2030, month=5, day=10)
+        for location in ('Accra', 'Kumasi'):
+            Event.objects.create(title=f'Meetup in {location}', description='', date=date, location=location)
+        response = self.client.get('/events/2030/5/', {'location': 'Accra'})
+        self.assertContains(response, 'Meetup in Accra')
+        self.assertNotContains(response, 'Meetup in Kumasi')
+
+
+class NewsletterSignupTests(TestCase):
+
+    def test_existing_address_in_other_case(self):
+        Newsletter.objects.create(email='John@Example.com')
+        for email in ('John@Example.com', 'john@example.com'):
+            response = self.client.post('/newsletter-subscribe/', {'email': email})
+            self.assertFalse(response.json()['success'], email)
+            self.assertIn('email', response.json()['errors'])
+        newsletter.flush()
+        self.assertEqual(Newsletter.objects.count(), 1)
+
+
+class SlugCacheTests(TestCase):
+    """Cached slug lookups follow saves of the model and of what it depends on"""
+
+    def resolve(self, slug):
+        queryset = BlogPost.objects.filter(published=True, is_active=True).prefetch_related('tag_index')
+        return slug_cache.resolve(queryset, slug, models=(Tag,))
+
+    def setUp(self):
+        author = User.objects.create(username='writer')
+        self.post = BlogPost.objects.create(
+            title='Slug cache post', content='Body', author=author, published=True, tags='alpha',
+        )
+
+    def assertGone(self, slug):
+        with self.assertRaises(BlogPost.DoesNotExist):
+            self.resolve(slug)
+
+    def test_inactive_and_unpublished(self):
+        self.assertEqual(self.resolve(self.post.slug), self.post)
+        for field in ('is_active', 'published'):
+            with self.subTest(field=field):
+                setattr(self.post, field, False)
+                self.post.save()
+                self.assertGone(self.post.slug)
+                setattr(self.post, field, True)
+                self.post.save()
+                self.assertEqual(self.resolve(self.post.slug), self.post)
+
+    def test_dependent_model(self):
+        def tag_names():
+            return [tag.name for tag in self.resolve(self.post.slug).tag_index.all()]
+
+        self.assertEqual(tag_names(), ['alpha'])
+        tag = Tag.objects.get()
+        # A queryset update sends no signals, so the cached row stays
+        Tag.objects.filter(pk=tag.pk).update(name='Renamed')
+        self.assertEqual(tag_names(), ['alpha'])
+        tag.refresh_from_db()
+        tag.save()
+        self.assertEqual(tag_names(), ['Renamed'])
+
+    def test_miss_stays_in_process(self):
+        self.assertGone('no-such-post')
+        with self.assertNumQueries(0):
+            self.assertGone('no-such-post')
+        self.assertIsNone(cache.get(f'slug:{slug_cache._prefix(BlogPost, (Tag,))}:no-such-post'))
+        BlogPost.objects.create(title='No such post', content='', author=self.post.author, published=True)
+        self.assertEqual(self.resolve('no-such-post').title, 'No such post')
+
+
+class TagTests(TestCase):
+
+    def test_long_tags_fit_the_fields(self):
+        author = User.objects.create(username='writer')
+        long_name = 'community development and youth empowerment ' * 4
+        post = BlogPost.objects.create(
+            title='Tagged', content='Body', author=author, published=True,
+            tags=f'{long_name}one, {long_name}two, short',
+        )
+        tags = list(post.tag_index.order_by('name'))
+        self.assertEqual([tag.post_count for tag in tags], [1, 1])
+        for tag in tags:
+            self.assertLessEqual(len(tag.name), Tag._meta.get_field('name').max_length)
+            self.assertLessEqual(len(tag.slug), Tag._meta.get_field('slug').max_length)
+        self.assertEqual(self.client.get('/blog/', {'q': long_name}).status_code, 200)
+
+
+class PrerenderExpiryTests(TestCase):
+
+    def test_homepage_rerendered_when_upcoming_event_starts(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        event = Event.objects.create(
+            title='Soon', description='', location='Accra', date=timezone.now() + timedelta(hours=1),
+        )
+        prerender.prerender_site(root=root, jobs=1)
+        self.assertEqual(prerender.expired_tags(root), set())
+        # As if the homepage had been written two hours ago, before the event started
+        written = (timezone.now() - timedelta(hours=2)).timestamp()
+        os.utime(prerender.output_path('/', root), (written, written))
+        Event.objects.filter(pk=event.pk).update(date=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(prerender.render_queued(root, jobs=1), [('/', 200)])
+        self.assertEqual(prerender.expired_tags(root), set())
+
+
+class CachedByVersionTests(TestCase):
+
+    def test_headers_survive_cache_hit(self):
+        for _ in range(2):
+            response = self.client.get('/sitemap.xml')
+            self.assertEqual(response['X-Robots-Tag'], 'noindex, noodp, noarchive')
+            self.assertEqual(response['Content-Type'], 'application/xml')
+
+    def test_unread_query_string_shares_entry(self):
+        self.client.get('/feeds/events.rss')
+        with self.assertNumQueries(0):
+            self.client.get('/feeds/events.rss', {'utm_source': 'newsletter'})
+
+
+class QueryPlanTests(TestCase):
+    """The public views' queries stay index-backed (see ``check_query_plans``)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='writer')
+        date = timezone.now().replace(year=2025, month=6, day=15)
+        for n in range(20):
+            location = ('Freetown', 'Bo', 'Kenema')[n % 3]
+            Event.objects.create(
+                title=f'Workshop {n}', description='Skills', date=date + timedelta(days=n), location=location,
+                is_active=n % 5 != 0,
+            )
+            Story.objects.create(title=f'Leader {n}', content='Story', author='Staff', location=location)
+            BlogPost.objects.create(
+                title=f'Health {n}', content='Post', author=author, published=n % 4 != 0, tags='health, youth',
+            )
+            Resource.objects.create(
+                title=f'Toolkit {n}', description='Guide', file=f'resources/{n}.pdf',
+                category=('guide', 'report')[n % 2],
+            )
+
+    def test_no_full_scans(self):
+        failures = query_plans.full_scans(connection, query_plans.sample_urls())
+        self.assertFalse(failures, '\n'.join(f'{url}: {sql}\n  {plan}' for url, sql, plan in failures))
+
+
+class RecountTests(TestCase):
+    """Saves and deletes keep FacetCount and EventMonth in step with the rows"""
+
+    def counts(self):
+        return dict(FacetCount.objects.filter(facet='event.location').values_list('value', 'count'))
+
+    def months(self):
+        return {(m.year, m.month): m.count for m in EventMonth.objects.all()}
+
+    def create(self, location, month):
+        date = timezone.now().replace(year=2030, month=month, day=10)
+        return Event.objects.create(title='Event', description='', date=date, location=location)
+
+    def test_location_change_and_delete(self):
+        first = self.create('Accra', 5)
+        self.create('Accra', 5)
+        self.assertEqual(self.counts(), {'Accra': 2})
+        first.location = 'Tamale'
+        first.save()
+        self.assertEqual(self.counts(), {'Accra': 1, 'Tamale': 1})
+        first.delete()
+        self.assertEqual(self.counts(), {'Accra': 1})
+
+    def test_deactivate(self):
+        event = self.create('Accra', 5)
+        event.is_active = False
+        event.save()
+        self.assertEqual(self.counts(), {})
+        self.assertEqual(self.months(), {})
+
+    def test_date_move(self):
+        event = self.create('Accra', 5)
+        self.create('Accra', 5)
+        self.assertEqual(self.months(), {(2030, 5): 2})
+        event.date = event.date.replace(month=7)
+        event.save()
+        self.assertEqual(self.months(), {(2030, 5): 1, (2030, 7): 1})
+        event.delete()
+        self.assertEqual(self.months(), {(2030, 5): 1})
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_archive_read_and_restore(self):
+        now = timezone.now()
+        for n, days in enumerate((800, 790, 700, 10)):
+            comment = Comment.objects.create(email='reader@example.com', text=f'Comment {n}')
+            Comment.objects.filter(pk=comment.pk).update(created_at=now - timedelta(days=days))
+
+        # Chunks smaller than the backlog exercise the chunk loop
+        self.assertEqual(retention.archive('comment', chunk_size=2, now=now, root=self.root), 3)
+        self.assertEqual(list(Comment.objects.values_list('text', flat=True)), ['Comment 3'])
+        self.assertEqual(len(retention.partitions(Comment, root=self.root)), 2)
+
+        # A chunk archived twice by an interrupted run is read back once
+        path = retention.partitions(Comment, root=self.root)[0]
+        with gzip.open(path, 'rt') as fh:
+            retention._append(path, [json.loads(line) for line in fh])
+        records = list(retention.read(Comment, root=self.root))
+        self.assertEqual([r['fields']['text'] for r in records], ['Comment 0', 'Comment 1', 'Comment 2'])
+
+        self.assertEqual(retention.restore(records), 3)
+        self.assertEqual(Comment.objects.count(), 4)
+        self.assertEqual(retention.restore(records), 0)
+
+    def test_condition_keeps_unread_contacts(self):
+        now = timezone.now()
+        for is_read in (True, False):
+            contact = Contact.objects.create(
+                name='Ama', email='ama@example.com', subject='Hello', message='Hi', is_read=is_read,
+            )
+            Contact.objects.filter(pk=contact.pk).update(created_at=now - timedelta(days=1000))
+        self.assertEqual(retention.archive('contact', now=now, root=self.root), 1)
+        self.assertEqual(list(Contact.objects.values_list('is_read', flat=True)), [False])
+
+
+class ImporterTests(TestCase):
+
+    def run_import(self, rows, **options):
+        rejected = []
+        job = importer.Importer(
+            Event, lambda number, errors, row: rejected.append((number, errors)), workers=1, **options,
+        )
+        job.run(rows)
+        return job, rejected
+
+    def test_existing_slugs(self):
+        Event.objects.create(title='Open Day', description='', date=timezone.now(), location='Accra')
+        row = {'description': 'Imported', 'date': '2030-05-10T10:00:00', 'location': 'Accra'}
+        job, rejected = self.run_import([
+            {**row, 'title': 'Open Day'},
+            {**row, 'title': 'Open Day'},
+            {**row, 'title': 'Taken slug', 'slug': 'open-day'},
+            {**row, 'title': 'Own slug', 'slug': 'own-slug'},
+            {**row, 'title': 'Duplicate slug', 'slug': 'own-slug'},
+        ])
+        self.assertEqual(job.imported, 3)
+        self.assertEqual([(number, list(errors)) for number, errors in rejected], [(3, ['slug']), (5, ['slug'])])
+        self.assertEqual(
+            set(Event.objects.values_list('slug', flat=True)),
+            {'open-day', 'open-day-2', 'open-day-3', 'own-slug'},
+        )
+        # finish() recounts what bulk_create skipped
+        self.assertEqual(FacetCount.objects.get(facet='event.location', value='Accra').count, 4)
+        self.assertEqual(EventMonth.objects.get(year=2030, month=5).count, 3)
+
+    def test_dry_run_writes_nothing(self):
+        row = {'title': 'Dry', 'description': 'Imported', 'date': '2030-05-10T10:00:00', 'location': 'Accra'}
+        job, rejected = self.run_import([row, {**row, 'description': ''}], dry_run=True)
+        self.assertEqual(job.imported, 1)
+        self.assertEqual([number for number, errors in rejected], [2])
+        self.assertFalse(Event.objects.exists())
@@ -1,7 +1,14 @@
 from django.urls import path
+from django.contrib.sitemaps import views as sitemap_views
 from . import views
 from .views import our_team_view
 from .views import DonateView
+from .feeds import BlogFeed, BlogAtomFeed, StoryFeed, StoryAtomFeed, EventFeed, EventAtomFeed
+from .models import Event, Story, BlogPost, Tag
+from .sitemaps import sitemaps
+from .versions import cached_by_version
+
+sitemap_models = (Event, Story, BlogPost, Tag)
 
 urlpatterns = [
     # Main pages
@@ -13,6 +20,8 @@ urlpatterns = [
     
     # Events
     path('events/', views.EventListView.as_view(), name='events'),
+    path('events/calendar.ics', views.event_calendar, name='event_calendar'),
+    path('events/<int:year>/<int:month>/', views.EventMonthArchiveView.as_view(), name='event_archive_month'),
     path('events/<slug:slug>/', views.EventDetailView.as_view(), name='event_detail'),
     
     # Stories
@@ -21,13 +30,27 @@ urlpatterns = [
     
     # Blog
     path('blog/', views.BlogListView.as_view(), name='blog'),
+    path('blog/tag/<slug:slug>/', views.BlogTagView.as_view(), name='blog_tag'),
     path('blog/<slug:slug>/', views.BlogDetailView.as_view(), name='blog_detail'),
     
     # Resources
     path('resources/', views.ResourceListView.as_view(), name='resources'),
     
+    # Sitemap and feeds (cached until content changes)
+    path('sitemap.xml', cached_by_version(*sitemap_models, query_params=('p',))(sitemap_views.index),
+         {'sitemaps': sitemaps, 'sitemap_url_name': 'sitemap_section'}, name='sitemap'),
+    path('sitemap-<section>.xml', cached_by_version(*sitemap_models, query_params=('p',))(sitemap_views.sitemap),
+         {'sitemaps': sitemaps}, name='sitemap_section'),
+    path('feeds/blog.rss', cached_by_version(BlogPost)(BlogFeed()), name='blog_feed'),
+    path('feeds/blog.atom', cached_by_version(BlogPost)(BlogAtomFeed()), name='blog_atom_feed'),
+    path('feeds/stories.rss', cached_by_version(Story)(StoryFeed()), name='story_feed'),
+    path('feeds/stories.atom', cached_by_version(Story)(StoryAtomFeed()), name='story_atom_feed'),
+    path('feeds/events.rss', cached_by_version(Event)(EventFeed()), name='event_feed'),
+    path('feeds/events.atom', cached_by_version(Event)(EventAtomFeed()), name='event_atom_feed'),
+
     # AJAX endpoints
     path('process-donation/', views.ProcessDonationView.as_view(), name='process_donation'),
     path('newsletter-subscribe/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
     path('api/track-download/<int:resource_id>/', views.track_download, name='track_download'),
 ]
@@ -0,0 +1,97 @@
+"""
+Per-model content versions.
+
+Every save or delete of a ``main`` model bumps that model's version (a
+nanosecond timestamp) in the cache. Anything derived from a set of models can
+key its cached output on their versions and is implicitly invalidated the
+moment one of them changes; the newest version doubles as Last-Modified.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+
+def _timeout():
+    return getattr(settings, 'VERSIONED_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def get_version(model):
+    version = cache.get(_key(model))
+    if version is None:
+        cache.add(_key(model), time.time_ns(), None)
+        version = cache.get(_key(model)) or time.time_ns()
+    return version
+
+
+def bump_version(model):
+    cache.set(_key(model), time.time_ns(), None)
+
+
+def combined_version(models):
+    """Short token that changes whenever any of ``models`` changes"""
+    versions = '-'.join(str(get_version(model)) for model in models)
+    return hashlib.sha1(versions.encode()).hexdigest()[:16]
+
+
+def cached(key, models, compute):
+    """``compute()``, cached until one of ``models`` changes"""
+    key = f'{key}:{combined_version(models)}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, _timeout())
+    return value
+
+
+def last_modified(models):
+    newest = max(get_version(model) for model in models)
+    return datetime.fromtimestamp(newest / 1e9, tz=dt_timezone.utc)
+
+
+def conditional_on(*models):
+    """Answer If-None-Match / If-Modified-Since from the versions of ``models``"""
+    return condition(
+        etag_func=lambda request, *args, **kwargs: combined_version(models),
+        last_modified_func=lambda request, *args, **kwargs: last_modified(models),
+    )
+
+
+def cached_by_version(*models, query_params=()):
+    """
+    Cache a view's rendered output and headers until one of ``models``
+    changes, and answer conditional GETs without rendering. Only the
+    ``query_params`` the view reads are part of the cache key, so other query
+    strings share the entry.
+    """
+    def decorator(view):
+        @conditional_on(*models)
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            params = urlencode(sorted(
+                (name, value) for name in query_params for value in request.GET.getlist(name)
+            ))
+            key = f'view:{request.build_absolute_uri(request.path)}?{params}:{combined_version(models)}'
+            cached = cache.get(key)
+            if cached is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.status_code != 200:
+                    return response
+                cached = (response.content, dict(response.headers))
+                cache.set(key, cached, _timeout())
+            content, headers = cached
+            return HttpResponse(content, headers=headers)
+        return wrapped
+    return decorator
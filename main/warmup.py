@@ -0,0 +1,69 @@
+"""
+Pre-fork warmup.
+
+With gunicorn ``--preload`` (see ``gunicorn.conf.py``) the application is
+imported once in the master process and workers are forked from it. Doing the
+per-process first-request work there too - resolving every URL pattern,
+compiling every template into the cached loader and loading content types -
+means each worker starts with it already done and shares the memory
+copy-on-write, instead of paying for it on its first requests.
+"""
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Every ``.html`` template the engine can load, relative to its directory"""
+    for directory in [*engine.dirs, *get_app_template_dirs('templates')]:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, filename), directory)
+
+
+def resolve_urls():
+    # Building the reverse lookup table imports and resolves every URLconf
+    return sum(1 for key in get_resolver().reverse_dict if isinstance(key, str))
+
+
+def compile_templates():
+    engine = engines['django'].engine
+    count = 0
+    for name in sorted(set(template_names(engine))):
+        try:
+            engine.get_template(name)
+            count += 1
+        except TemplateSyntaxError as exc:
+            logger.warning('Could not compile %s: %s', name, exc)
+    return count
+
+
+def load_content_types():
+    return len(ContentType.objects.get_for_models(*apps.get_models()))
+
+
+def warmup():
+    """Do first-request work up front; safe to call before forking"""
+    start = time.perf_counter()
+    try:
+        urls = resolve_urls()
+        templates = compile_templates()
+        content_types = load_content_types()
+    finally:
+        # Never hand a connection opened here to forked workers
+        connections.close_all()
+    summary = 'Warmed up %d URL names, %d templates, %d content types in %.0f ms' % (
+        urls, templates, content_types, (time.perf_counter() - start) * 1000,
+    )
+    logger.info(summary)
+    return summary